@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends
-from core.security import require_role
+from fastapi import APIRouter, Depends, Query
+from core.security import require_role, password_pool, token_cache
 from core.database import get_database
+from core.cache import report_cache
 from models.schemas import UserRole
-from typing import Dict
+from services.user_stats_service import UserStatsService
+from services.admin_stats_service import AdminStatsService, admin_stats_cache
+from services.auth_service import user_cache
+from services.rollup_service import RollupService
+from typing import Dict, Optional
+import asyncio
 
 router = APIRouter()
 
@@ -11,39 +17,7 @@ async def get_admin_stats(
     current_user: Dict = Depends(require_role([UserRole.SUPERADMIN]))
 ):
     """Get comprehensive admin statistics"""
-    db = await get_database()
-    
-    # Get counts
-    total_users = await db.users.count_documents({})
-    total_nfas = await db.nfa_requests.count_documents({})
-    total_vendors = await db.vendors.count_documents({})
-    total_approvals = await db.approval_workflows.count_documents({})
-    
-    # Get pending counts
-    pending_approvals = await db.approval_workflows.count_documents({"status": "pending"})
-    pending_nfas = await db.nfa_requests.count_documents({
-        "status": {"$in": ["section1_pending", "section2_pending"]}
-    })
-    
-    # Get recent activity
-    recent_nfas = await db.nfa_requests.find(
-        {},
-        {"_id": 0, "id": 1, "nfa_number": 1, "status": 1, "requestor_name": 1, "created_at": 1}
-    ).sort("created_at", -1).limit(10).to_list(10)
-    
-    return {
-        "totals": {
-            "users": total_users,
-            "nfas": total_nfas,
-            "vendors": total_vendors,
-            "approvals": total_approvals
-        },
-        "pending": {
-            "approvals": pending_approvals,
-            "nfas": pending_nfas
-        },
-        "recent_nfas": recent_nfas
-    }
+    return await AdminStatsService.get_admin_stats()
 
 @router.post("/clear-database")
 async def clear_database(
@@ -61,6 +35,14 @@ async def clear_database(
     # Delete attachments
     attachment_result = await db.attachments.delete_many({})
     
+    # Restart NFA numbering and recount dashboards
+    await db.counters.delete_many({})
+    await UserStatsService.rebuild_user_stats()
+    await RollupService.rebuild_rollups()
+    report_cache.clear()
+    admin_stats_cache.clear()
+    user_cache.clear()
+    
     return {
         "message": "Database cleared",
         "deleted": {
@@ -70,6 +52,24 @@ async def clear_database(
         }
     }
 
+@router.post("/rebuild-user-stats")
+async def rebuild_user_stats(
+    current_user: Dict = Depends(require_role([UserRole.SUPERADMIN]))
+):
+    """Rebuild per-user dashboard counters from scratch to correct drift"""
+    users = await UserStatsService.rebuild_user_stats()
+    return {"message": "User stats rebuilt", "users": users}
+
+@router.post("/rebuild-rollups")
+async def rebuild_rollups(
+    current_user: Dict = Depends(require_role([UserRole.SUPERADMIN]))
+):
+    """Backfill analytics rollups from the NFA and approval collections"""
+    await RollupService.rebuild_rollups()
+    report_cache.clear()
+    admin_stats_cache.clear()
+    return {"message": "Analytics rollups rebuilt"}
+
 @router.get("/system-health")
 async def get_system_health(
     current_user: Dict = Depends(require_role([UserRole.SUPERADMIN]))
@@ -87,13 +87,57 @@ async def get_system_health(
     # Test Redis connection
     try:
         from tasks.celery_app import celery_app
-        celery_status = celery_app.control.ping(timeout=1.0)
+        # Control commands block while waiting for replies, so keep them off the event loop
+        celery_status = await asyncio.to_thread(celery_app.control.ping, timeout=1.0)
         redis_status = "healthy" if celery_status else "unhealthy"
     except Exception as e:
         redis_status = f"unhealthy: {str(e)}"
     
+    # Mail queue depth and send latency, as published by each worker process
+    mail_workers = {
+        doc.pop("_id"): doc async for doc in db.mail_metrics.find({})
+    }
+    
     return {
         "database": db_status,
         "redis": redis_status,
+        "mail": {
+            "workers": mail_workers,
+            "dead_letters": await db.mail_dead_letters.estimated_document_count()
+        },
+        "password_hashing": password_pool.stats(),
+        "token_cache": token_cache.stats(),
+        "report_cache": report_cache.stats(),
+        "admin_stats_cache": admin_stats_cache.stats(),
         "overall": "healthy" if db_status == "healthy" and redis_status == "healthy" else "degraded"
     }
+
+@router.get("/mail-dead-letters")
+async def get_mail_dead_letters(
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: Dict = Depends(require_role([UserRole.SUPERADMIN]))
+):
+    """List emails that could not be delivered, newest first"""
+    db = await get_database()
+    letters = await db.mail_dead_letters.find(
+        {}, {"_id": 0, "body": 0}
+    ).sort("failed_at", -1).limit(limit).to_list(limit)
+    return letters
+
+@router.post("/mail-dead-letters/replay")
+async def replay_mail_dead_letters(
+    letter_id: Optional[str] = Query(None),
+    current_user: Dict = Depends(require_role([UserRole.SUPERADMIN]))
+):
+    """Re-enqueue one dead-lettered email, or all of them when no id is given"""
+    from celery import group
+    from tasks.email_tasks import replay_dead_letter
+    
+    db = await get_database()
+    query = {"id": letter_id} if letter_id else {}
+    letters = await db.mail_dead_letters.find(query, {"_id": 0, "id": 1}).to_list(None)
+    
+    if letters:
+        signatures = [replay_dead_letter.s(letter["id"]) for letter in letters]
+        await asyncio.to_thread(group(signatures).apply_async)
+    return {"message": f"Replaying {len(letters)} email(s)"}
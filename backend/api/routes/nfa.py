@@ -1,19 +1,57 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query, UploadFile, File
+from fastapi import APIRouter, HTTPException, status, Depends, Query, UploadFile, File, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from models.schemas import (
     NFACreate, NFAUpdate, NFAResponse, NFAStatus,
     Section1Data, Section2Data, UserRole
 )
-from services.nfa_service import NFAService
+from services.nfa_service import NFAService, NFA_LIST_SORT
 from services.auth_service import AuthService
-from core.security import get_current_user
+from services.digest_service import DigestService
+from services.export_service import ExportService, EXPORT_MEDIA_TYPES
+from core.config import settings
+from core.security import get_current_user, SecurityService
 from core.database import get_database
+from core.pagination import NEXT_CURSOR_HEADER, next_cursor
 from typing import List, Dict, Any
+from datetime import datetime, timezone
 import aiofiles
+import asyncio
 import uuid
 import os
 
 router = APIRouter()
 
+async def notify_approvers(nfa_id: str, approvers: List[Dict[str, Any]], nfa_details: Dict[str, Any]):
+    """Resolve approvers in one query and enqueue their notifications as a single group
+    
+    Approvers who opted into digests get the NFA added to their open digest
+    instead; only the notification that opens a digest schedules its flush.
+    """
+    from celery import group
+    from tasks.email_tasks import send_approval_notification, send_approval_digest
+    
+    approver_users = await AuthService.get_users_by_ids([a["user_id"] for a in approvers])
+    signatures = []
+    digest_approvers = []
+    for approver in (approver_users.get(a["user_id"]) for a in approvers):
+        if not approver:
+            continue
+        if DigestService.wants_digest(approver, nfa_details):
+            digest_approvers.append(approver)
+        else:
+            signatures.append(
+                send_approval_notification.s(nfa_id, approver["email"], approver["name"], nfa_details)
+            )
+    
+    for approver_id in await DigestService.enqueue_many(digest_approvers, nfa_id, nfa_details):
+        signatures.append(
+            send_approval_digest.s(approver_id).set(countdown=settings.APPROVAL_DIGEST_WINDOW_SECONDS)
+        )
+    
+    if signatures:
+        # Publishing to the broker is blocking I/O, so keep it off the event loop
+        await asyncio.to_thread(group(signatures).apply_async)
+
 @router.post("/", response_model=NFAResponse, status_code=status.HTTP_201_CREATED)
 async def create_nfa(
     nfa_data: NFACreate,
@@ -31,12 +69,14 @@ async def create_nfa(
 
 @router.get("/", response_model=List[NFAResponse])
 async def get_nfas(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=1000),
     status_filter: str = Query(None),
+    cursor: str = Query(None),
     current_user: Dict = Depends(get_current_user)
 ):
-    """Get NFAs based on user role"""
+    """Get NFAs based on user role (pass the X-Next-Cursor header back as `cursor` for the next page)"""
     filters = {}
     
     if status_filter:
@@ -46,19 +86,63 @@ async def get_nfas(
     if UserRole.SUPERADMIN.value not in current_user.get("roles", []):
         filters["requestor_id"] = current_user["user_id"]
     
-    nfas = await NFAService.get_all_nfas(skip, limit, filters)
+    try:
+        nfas = await NFAService.get_all_nfas(skip, limit, filters, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    page_cursor = next_cursor(nfas, NFA_LIST_SORT, limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
     return nfas
 
 @router.get("/my-nfas", response_model=List[NFAResponse])
 async def get_my_nfas(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=1000),
+    cursor: str = Query(None),
     current_user: Dict = Depends(get_current_user)
 ):
     """Get current user's NFAs"""
-    nfas = await NFAService.get_nfas_by_requestor(current_user["user_id"], skip, limit)
+    try:
+        nfas = await NFAService.get_nfas_by_requestor(current_user["user_id"], skip, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    page_cursor = next_cursor(nfas, NFA_LIST_SORT, limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
     return nfas
 
+@router.get("/export")
+async def export_nfas(
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson|xlsx)$"),
+    status_filter: str = Query(None),
+    current_user: Dict = Depends(get_current_user)
+):
+    """Stream the NFA register with approval history as CSV, NDJSON or XLSX"""
+    filters = {}
+    
+    if status_filter:
+        filters["status"] = status_filter
+    
+    # If not SuperAdmin, export only user's NFAs
+    if UserRole.SUPERADMIN.value not in current_user.get("roles", []):
+        filters["requestor_id"] = current_user["user_id"]
+    
+    try:
+        await ExportService.check_size(export_format, filters)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    filename = f"nfa-register-{datetime.now(timezone.utc):%Y%m%d}.{export_format}"
+    return StreamingResponse(
+        ExportService.stream(export_format, filters),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/{nfa_id}", response_model=NFAResponse)
 async def get_nfa(
     nfa_id: str,
@@ -84,6 +168,22 @@ async def get_nfa(
     
     return nfa
 
+@router.get("/{nfa_id}/pdf")
+async def download_nfa_pdf(
+    nfa_id: str,
+    expires: int = Query(...),
+    signature: str = Query(...)
+):
+    """Download a finalized NFA's PDF through a signed link (as sent in large approval emails)"""
+    if not SecurityService.verify_download(nfa_id, expires, signature):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired link")
+    
+    nfa = await NFAService.get_nfa_by_id(nfa_id)
+    if not nfa or not nfa.get("pdf_url") or not os.path.exists(nfa["pdf_url"]):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="PDF not found")
+    
+    return FileResponse(nfa["pdf_url"], media_type="application/pdf", filename=os.path.basename(nfa["pdf_url"]))
+
 @router.post("/{nfa_id}/submit-section1")
 async def submit_section1(
     nfa_id: str,
@@ -106,23 +206,20 @@ async def submit_section1(
     if not approvers:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No approvers configured")
     
-    updated_nfa = await NFAService.submit_section1(nfa_id, approvers)
+    try:
+        updated_nfa = await NFAService.submit_section1(nfa_id, approvers)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
     # Send email notifications
-    from tasks.email_tasks import send_approval_notification
-    db = await get_database()
-    
-    for approver_data in approvers:
-        approver = await db.users.find_one({"id": approver_data["user_id"]}, {"_id": 0})
-        if approver:
-            nfa_details = {
-                "subject": nfa.get("section1_data", {}).get("subject_item", "N/A"),
-                "requestor_name": nfa["requestor_name"],
-                "department": nfa.get("section1_data", {}).get("department", "N/A"),
-                "amount": nfa.get("section1_data", {}).get("amount_of_approval", 0),
-                "currency": nfa.get("section1_data", {}).get("currency", "INR")
-            }
-            send_approval_notification.delay(nfa_id, approver["email"], approver["name"], nfa_details)
+    nfa_details = {
+        "subject": nfa.get("section1_data", {}).get("subject_item", "N/A"),
+        "requestor_name": nfa["requestor_name"],
+        "department": nfa.get("section1_data", {}).get("department", "N/A"),
+        "amount": nfa.get("section1_data", {}).get("amount_of_approval", 0),
+        "currency": nfa.get("section1_data", {}).get("currency", "INR")
+    }
+    await notify_approvers(nfa_id, approvers, nfa_details)
     
     return updated_nfa
 
@@ -145,7 +242,10 @@ async def update_section2(
     if nfa["status"] != NFAStatus.SECTION1_APPROVED.value:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Section 1 not yet approved")
     
-    updated_nfa = await NFAService.update_section2(nfa_id, section2_data, current_user["user_id"])
+    try:
+        updated_nfa = await NFAService.update_section2(nfa_id, section2_data, current_user["user_id"])
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     return updated_nfa
 
 @router.post("/{nfa_id}/submit-section2")
@@ -167,23 +267,20 @@ async def submit_section2(
     if not approvers:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No approvers configured")
     
-    updated_nfa = await NFAService.submit_section2(nfa_id, approvers)
+    try:
+        updated_nfa = await NFAService.submit_section2(nfa_id, approvers)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
     # Send email notifications
-    from tasks.email_tasks import send_approval_notification
-    db = await get_database()
-    
-    for approver_data in approvers:
-        approver = await db.users.find_one({"id": approver_data["user_id"]}, {"_id": 0})
-        if approver:
-            nfa_details = {
-                "subject": nfa.get("section1_data", {}).get("subject_item", "N/A"),
-                "requestor_name": nfa["requestor_name"],
-                "department": nfa.get("section1_data", {}).get("department", "N/A"),
-                "amount": nfa.get("section2_data", {}).get("amount_of_approval", 0),
-                "currency": nfa.get("section1_data", {}).get("currency", "INR")
-            }
-            send_approval_notification.delay(nfa_id, approver["email"], approver["name"], nfa_details)
+    nfa_details = {
+        "subject": nfa.get("section1_data", {}).get("subject_item", "N/A"),
+        "requestor_name": nfa["requestor_name"],
+        "department": nfa.get("section1_data", {}).get("department", "N/A"),
+        "amount": nfa.get("section2_data", {}).get("amount_of_approval", 0),
+        "currency": nfa.get("section1_data", {}).get("currency", "INR")
+    }
+    await notify_approvers(nfa_id, approvers, nfa_details)
     
     return updated_nfa
 
@@ -222,7 +319,7 @@ async def upload_attachment(
         "file_path": file_path,
         "file_size": len(content),
         "uploaded_by": current_user["user_id"],
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     
     await db.attachments.insert_one(attachment_doc)
@@ -255,5 +352,3 @@ async def delete_nfa(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="NFA not found")
     
     return {"message": "NFA deleted successfully"}
-
-from datetime import datetime, timezone
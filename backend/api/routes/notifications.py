@@ -1,11 +1,15 @@
 from fastapi import APIRouter, Depends
 from core.security import get_current_user
 from core.database import get_database
+from core.joins import attach_related
+from core.timestamps import to_datetime
 from typing import Dict, List
 from datetime import datetime, timezone, timedelta
 
 router = APIRouter()
 
+NOTIFICATION_NFA_PROJECTION = {"id": 1, "nfa_number": 1}
+
 @router.get("/unread")
 async def get_unread_notifications(
     current_user: Dict = Depends(get_current_user)
@@ -20,10 +24,12 @@ async def get_unread_notifications(
         "status": "pending"
     }).to_list(10)
     
+    # Get NFA details in one batched query
+    await attach_related(approvals, "nfa_id", db.nfa_requests, "nfa", NOTIFICATION_NFA_PROJECTION)
+    
     notifications = []
     for approval in approvals:
-        # Get NFA details
-        nfa = await db.nfa_requests.find_one({"id": approval["nfa_id"]})
+        nfa = approval.get("nfa")
         if nfa:
             notifications.append({
                 "title": "Approval Required",
@@ -58,10 +64,12 @@ async def get_all_notifications(
         "approver_id": user_id
     }).sort("created_at", -1).limit(limit).to_list(limit)
     
+    # Get NFA details in one batched query
+    await attach_related(approvals, "nfa_id", db.nfa_requests, "nfa", NOTIFICATION_NFA_PROJECTION)
+    
     notifications = []
     for approval in approvals:
-        # Get NFA details
-        nfa = await db.nfa_requests.find_one({"id": approval["nfa_id"]})
+        nfa = approval.get("nfa")
         if nfa:
             if approval["status"] == "pending":
                 title = "Approval Required"
@@ -74,8 +82,8 @@ async def get_all_notifications(
                 message = f"Action taken on NFA {nfa.get('nfa_number', approval['nfa_id'][:8])}"
                 
             # Calculate relative time
-            created_at = datetime.fromisoformat(approval.get("created_at", datetime.now(timezone.utc).isoformat()))
             now = datetime.now(timezone.utc)
+            created_at = to_datetime(approval.get("created_at")) or now
             delta = now - created_at
             
             if delta.days > 0:
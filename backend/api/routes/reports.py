@@ -1,9 +1,16 @@
 from fastapi import APIRouter, Depends, Query
 from core.security import get_current_user, require_role
 from core.database import get_database
-from models.schemas import UserRole, NFAStatus
-from typing import Dict, List
+from core.cache import report_cache
+from core.joins import fetch_by_ids
+from core.timestamps import to_datetime
+from models.schemas import UserRole
+from services.user_stats_service import UserStatsService
+from services.rollup_service import RollupService
+from services.cycle_time_service import CycleTimeService
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timezone, timedelta
+import asyncio
 
 router = APIRouter()
 
@@ -23,44 +30,22 @@ async def get_dashboard_stats(
         }
     }
     
-    # Requestor stats
-    if UserRole.REQUESTOR.value in roles or UserRole.SUPERADMIN.value in roles:
-        # Get current month start date
-        from datetime import datetime
-        start_of_month = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0).isoformat()
+    # Requestor and approver counters come from one user_stats document
+    is_superadmin = UserRole.SUPERADMIN.value in roles
+    if UserRole.REQUESTOR.value in roles or UserRole.APPROVER.value in roles or is_superadmin:
+        user_stats = await UserStatsService.get_user_stats(user_id)
         
-        total_nfas = await db.nfa_requests.count_documents({"requestor_id": user_id})
-        pending_nfas = await db.nfa_requests.count_documents({
-            "requestor_id": user_id,
-            "status": {"$in": [NFAStatus.SECTION1_PENDING.value, NFAStatus.SECTION2_PENDING.value]}
-        })
-        approved_nfas = await db.nfa_requests.count_documents({
-            "requestor_id": user_id,
-            "status": NFAStatus.APPROVED.value
-        })
-        this_month_nfas = await db.nfa_requests.count_documents({
-            "requestor_id": user_id,
-            "created_at": {"$gte": start_of_month}
-        })
+        if UserRole.REQUESTOR.value in roles or is_superadmin:
+            stats["requestor"] = user_stats["requestor"]
         
-        stats["requestor"] = {
-            "total": total_nfas,
-            "pending": pending_nfas,
-            "approved": approved_nfas,
-            "this_month": this_month_nfas
-        }
-    
-    # Approver stats
-    if UserRole.APPROVER.value in roles or UserRole.SUPERADMIN.value in roles:
-        from services.approval_service import ApprovalService
-        approval_stats = await ApprovalService.get_approver_statistics(user_id)
-        stats["approver"] = approval_stats
+        if UserRole.APPROVER.value in roles or is_superadmin:
+            stats["approver"] = user_stats["approver"]
     
     # SuperAdmin stats
-    if UserRole.SUPERADMIN.value in roles:
-        total_users = await db.users.count_documents({})
-        total_nfas_all = await db.nfa_requests.count_documents({})
-        total_vendors = await db.vendors.count_documents({})
+    if is_superadmin:
+        total_users = await db.users.estimated_document_count()
+        total_nfas_all = await db.nfa_requests.estimated_document_count()
+        total_vendors = await db.vendors.estimated_document_count()
         
         stats["admin"] = {
             "total_users": total_users,
@@ -70,113 +55,145 @@ async def get_dashboard_stats(
     
     return stats
 
+def resolve_range(
+    days: Optional[int],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Explicit start/end dates win over a trailing `days` window; no bounds means all time"""
+    start = to_datetime(start_date)
+    end = to_datetime(end_date)
+    if not start and days:
+        start = (end or datetime.now(timezone.utc)) - timedelta(days=days)
+    return start, end
+
+async def average_duration_days(
+    db,
+    completed_field: str,
+    duration_field: str,
+    start: Optional[datetime],
+    end: Optional[datetime]
+) -> float:
+    """Mean of a stored duration over items completed in a window, in days
+    
+    Matches and groups only on the (completed_at, duration) index, so the query is covered.
+    """
+    window = {}
+    if start:
+        window["$gte"] = start
+    if end:
+        window["$lte"] = end
+    pipeline = [
+        {"$match": {completed_field: window or {"$exists": True}}},
+        {"$group": {"_id": None, "avg": {"$avg": f"${duration_field}"}}}
+    ]
+    result = await db.nfa_requests.aggregate(pipeline).to_list(1)
+    avg_seconds = result[0]["avg"] if result else None
+    return round(avg_seconds / 86400, 2) if avg_seconds else 0
+
 @router.get("/nfa-analytics")
 async def get_nfa_analytics(
     days: int = Query(30, ge=1, le=365),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
     current_user: Dict = Depends(require_role([UserRole.SUPERADMIN]))
 ):
     """Get NFA analytics (SuperAdmin only)"""
+    return await report_cache.get_or_compute(
+        ("nfa-analytics", days, start_date, end_date),
+        lambda: build_nfa_analytics(days, start_date, end_date)
+    )
+
+async def build_nfa_analytics(
+    days: int,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> Dict[str, Any]:
     db = await get_database()
     
-    start_date = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    start, end = resolve_range(days, start_date, end_date)
     
-    # NFAs by status
-    pipeline = [
-        {"$match": {"created_at": {"$gte": start_date}}},
-        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
-    ]
-    status_counts = await db.nfa_requests.aggregate(pipeline).to_list(100)
-    
-    # NFAs by department
-    pipeline = [
-        {"$match": {"created_at": {"$gte": start_date}}},
-        {"$group": {"_id": "$section1_data.department", "count": {"$sum": 1}}}
-    ]
-    dept_counts = await db.nfa_requests.aggregate(pipeline).to_list(100)
+    # NFAs by status and department, from the daily rollups
+    status_counts = await RollupService.nfa_counts_by("status", start, end)
+    dept_counts = await RollupService.nfa_counts_by("department", start, end)
     
-    # Average approval time
-    pipeline = [
-        {"$match": {"status": NFAStatus.APPROVED.value}},
-        {
-            "$project": {
-                "approval_time": {
-                    "$dateDiff": {
-                        "startDate": {"$toDate": "$created_at"},
-                        "endDate": {"$toDate": "$updated_at"},
-                        "unit": "day"
-                    }
-                }
-            }
-        },
-        {
-            "$group": {
-                "_id": None,
-                "avg_time": {"$avg": "$approval_time"}
-            }
-        }
-    ]
-    avg_time_result = await db.nfa_requests.aggregate(pipeline).to_list(1)
-    avg_approval_time = avg_time_result[0]["avg_time"] if avg_time_result else 0
+    # Average durations from the stamped completion fields, over the same window
+    avg_total, avg_section1, avg_section2 = await asyncio.gather(
+        average_duration_days(db, "finalized_at", "total_duration_seconds", start, end),
+        average_duration_days(db, "section1_completed_at", "section1_duration_seconds", start, end),
+        average_duration_days(db, "section2_completed_at", "section2_duration_seconds", start, end)
+    )
     
     return {
-        "period_days": days,
+        "period_days": ((end or datetime.now(timezone.utc)) - start).days,
+        "start_date": start,
+        "end_date": end,
         "by_status": status_counts,
         "by_department": dept_counts,
-        "avg_approval_time_days": round(avg_approval_time, 2)
+        "avg_approval_time_days": avg_total,
+        "avg_section_time_days": {
+            "section1": avg_section1,
+            "section2": avg_section2
+        }
     }
 
 @router.get("/approval-performance")
 async def get_approval_performance(
+    days: Optional[int] = Query(None, ge=1),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
     current_user: Dict = Depends(require_role([UserRole.SUPERADMIN]))
 ):
-    """Get approval performance metrics (SuperAdmin only)"""
-    db = await get_database()
+    """Get approval performance metrics (SuperAdmin only, all time unless a range is given)"""
+    start, end = resolve_range(days, start_date, end_date)
     
-    # Approver performance
-    pipeline = [
-        {
-            "$group": {
-                "_id": "$approver_id",
-                "approver_name": {"$first": "$approver_name"},
-                "total": {"$sum": 1},
-                "approved": {
-                    "$sum": {"$cond": [{"$eq": ["$status", "approved"]}, 1, 0]}
-                },
-                "rejected": {
-                    "$sum": {"$cond": [{"$eq": ["$status", "rejected"]}, 1, 0]}
-                },
-                "pending": {
-                    "$sum": {"$cond": [{"$eq": ["$status", "pending"]}, 1, 0]}
-                }
-            }
-        },
-        {"$sort": {"total": -1}},
-        {"$limit": 20}
-    ]
-    
-    performance = await db.approval_workflows.aggregate(pipeline).to_list(20)
-    return performance
+    return await report_cache.get_or_compute(
+        ("approval-performance", days, start_date, end_date),
+        lambda: RollupService.approver_performance(start, end, limit=20)
+    )
 
 @router.get("/vendor-analytics")
 async def get_vendor_analytics(
+    days: Optional[int] = Query(None, ge=1),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
     current_user: Dict = Depends(require_role([UserRole.SUPERADMIN, UserRole.COORDINATOR]))
 ):
-    """Get vendor analytics"""
+    """Get vendor analytics (all time unless a range is given)"""
+    return await report_cache.get_or_compute(
+        ("vendor-analytics", days, start_date, end_date),
+        lambda: build_vendor_analytics(days, start_date, end_date)
+    )
+
+async def build_vendor_analytics(
+    days: Optional[int],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> Dict[str, Any]:
     db = await get_database()
     
-    # Vendor usage count
-    pipeline = [
-        {"$match": {"section2_data.vendor_id": {"$exists": True, "$ne": None}}},
-        {"$group": {"_id": "$section2_data.vendor_id", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}},
-        {"$limit": 10}
-    ]
+    start, end = resolve_range(days, start_date, end_date)
     
-    vendor_usage = await db.nfa_requests.aggregate(pipeline).to_list(10)
+    # Vendor usage count
+    vendor_usage = await RollupService.top_vendors(start, end, limit=10)
     
-    # Enrich with vendor names
+    # Enrich with vendor names in one batched query
+    vendors = await fetch_by_ids(db.vendors, [item["_id"] for item in vendor_usage], {"name": 1})
     for item in vendor_usage:
-        vendor = await db.vendors.find_one({"id": item["_id"]}, {"_id": 0, "name": 1})
+        vendor = vendors.get(item["_id"])
         item["vendor_name"] = vendor["name"] if vendor else "Unknown"
     
     return {"top_vendors": vendor_usage}
+
+@router.get("/cycle-times")
+async def get_cycle_times(
+    days: Optional[int] = Query(90, ge=1),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    current_user: Dict = Depends(require_role([UserRole.SUPERADMIN]))
+):
+    """Get p50/p90/p99 time-in-pending by approver, section, department and month (SuperAdmin only)"""
+    start, end = resolve_range(days, start_date, end_date)
+    
+    report = await CycleTimeService.get_cycle_times(start, end)
+    return {"start_date": start, "end_date": end, **report}
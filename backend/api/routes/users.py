@@ -1,22 +1,41 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from models.schemas import UserCreate, UserUpdate, UserResponse, UserRole
 from services.auth_service import AuthService
-from core.security import get_current_user, require_role, SecurityService
+from core.security import get_current_user, require_role, SecurityService, token_cache
 from core.database import get_database
+from core.pagination import NEXT_CURSOR_HEADER, apply_keyset, next_cursor
 from typing import List, Dict, Any
 from datetime import datetime, timezone
+from pymongo import ReturnDocument
 
 router = APIRouter()
 
+USER_LIST_SORT = [("created_at", -1), ("id", -1)]
+
 @router.get("/", response_model=List[UserResponse])
 async def get_users(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=1000),
+    cursor: str = Query(None),
     current_user: Dict = Depends(require_role([UserRole.SUPERADMIN, UserRole.APPROVER]))
 ):
     """Get all users (Admin/Approver only)"""
     db = await get_database()
-    users = await db.users.find({}, {"_id": 0, "password_hash": 0}).skip(skip).limit(limit).to_list(limit)
+    
+    try:
+        query = apply_keyset({}, USER_LIST_SORT, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    find_cursor = db.users.find(query, {"_id": 0, "password_hash": 0}).sort(USER_LIST_SORT)
+    if not cursor:
+        find_cursor = find_cursor.skip(skip)
+    users = await find_cursor.limit(limit).to_list(limit)
+    
+    page_cursor = next_cursor(users, USER_LIST_SORT, limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
     return users
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -47,20 +66,28 @@ async def update_user(
     
     # Handle password update
     if "password" in update_data and update_data["password"]:
-        update_data["password_hash"] = SecurityService.hash_password(update_data["password"])
+        update_data["password_hash"] = await SecurityService.hash_password_async(update_data["password"])
         del update_data["password"]
     
     # Handle roles update
     if "roles" in update_data:
         update_data["roles"] = [role.value if isinstance(role, UserRole) else role for role in update_data["roles"]]
     
-    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
+    update_data["updated_at"] = datetime.now(timezone.utc)
     
-    await db.users.update_one(
+    previous = await db.users.find_one_and_update(
         {"id": user_id},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"_id": 0, "roles": 1},
+        return_document=ReturnDocument.BEFORE
     )
     
+    AuthService.invalidate_cached_user(user_id)
+    
+    # Tokens carry roles, so role changes require a fresh login
+    if previous and "roles" in update_data and set(update_data["roles"]) != set(previous.get("roles", [])):
+        await AuthService.revoke_tokens(user_id)
+    
     user = await AuthService.get_user_by_id(user_id)
     return user
 
@@ -76,6 +103,9 @@ async def delete_user(
     if result.deleted_count == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
+    AuthService.invalidate_cached_user(user_id)
+    token_cache.invalidate_user(user_id)
+    
     return {"message": "User deleted successfully"}
 
 @router.get("/search/", response_model=List[UserResponse])
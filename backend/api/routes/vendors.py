@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from models.schemas import VendorCreate, VendorUpdate, VendorResponse, UserRole
-from services.vendor_service import VendorService
+from services.vendor_service import VendorService, VENDOR_LIST_SORT
 from core.security import get_current_user, require_role
+from core.pagination import NEXT_CURSOR_HEADER, next_cursor
 from typing import List, Dict
 
 router = APIRouter()
@@ -20,13 +21,22 @@ async def create_vendor(
 
 @router.get("/", response_model=List[VendorResponse])
 async def get_vendors(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=1000),
     status_filter: str = Query(None),
+    cursor: str = Query(None),
     current_user: Dict = Depends(get_current_user)
 ):
     """Get all vendors"""
-    vendors = await VendorService.get_all_vendors(skip, limit, status_filter)
+    try:
+        vendors = await VendorService.get_all_vendors(skip, limit, status_filter, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    page_cursor = next_cursor(vendors, VENDOR_LIST_SORT, limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
     return vendors
 
 @router.get("/search")
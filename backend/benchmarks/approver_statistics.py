@@ -0,0 +1,125 @@
+"""Approver statistics latency at 1M approval workflows
+
+Seeds a scratch database (<DB_NAME>_bench on MONGO_URL) with approval
+workflows spread over a set of approvers, builds the declared indexes, then
+times the old four count_documents round trips against the single covered
+$group in ApprovalService.get_approver_statistics, cold and memoized.
+
+    cd backend && python -m benchmarks.approver_statistics --workflows 1000000
+"""
+from benchmarks.common import connect_bench_db, drop_bench_db, format_summary
+from core.database import INDEX_SPECS, reconcile_indexes
+from models.schemas import ApprovalStatus
+from services.approval_service import ApprovalService, approver_stats_cache
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+STATUSES = [ApprovalStatus.PENDING.value, ApprovalStatus.APPROVED.value, ApprovalStatus.REJECTED.value]
+INSERT_BATCH = 10000
+
+async def seed(db, workflows: int, approvers: int):
+    if await db.approval_workflows.estimated_document_count() == workflows:
+        return
+    await db.approval_workflows.drop()
+    for offset in range(0, workflows, INSERT_BATCH):
+        await db.approval_workflows.insert_many([
+            {
+                "id": str(uuid.uuid4()),
+                "nfa_id": f"nfa-{n // 4}",
+                "section": 1,
+                "sequence": n % 4 + 1,
+                "approver_id": f"approver-{n % approvers}",
+                "approver_name": f"Approver {n % approvers}",
+                "status": random.choice(STATUSES)
+            }
+            for n in range(offset, min(offset + INSERT_BATCH, workflows))
+        ], ordered=False)
+    await reconcile_indexes("approval_workflows", INDEX_SPECS["approval_workflows"])
+
+async def four_counts(db, approver_id: str):
+    return {
+        "total": await db.approval_workflows.count_documents({"approver_id": approver_id}),
+        **{
+            status: await db.approval_workflows.count_documents({"approver_id": approver_id, "status": status})
+            for status in STATUSES
+        }
+    }
+
+async def timed(call, approver_ids):
+    samples = []
+    for approver_id in approver_ids:
+        started = time.perf_counter()
+        await call(approver_id)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+async def main(workflows: int, approvers: int, samples: int, keep: bool):
+    db = await connect_bench_db()
+    try:
+        started = time.perf_counter()
+        await seed(db, workflows, approvers)
+        print(f"{workflows} workflows over {approvers} approvers ready in {time.perf_counter() - started:.1f}s")
+
+        approver_ids = [f"approver-{random.randrange(approvers)}" for _ in range(samples)]
+
+        async def cold(approver_id):
+            approver_stats_cache.clear()
+            return await ApprovalService.get_approver_statistics(approver_id)
+
+        legacy = await timed(lambda approver_id: four_counts(db, approver_id), approver_ids)
+        grouped = await timed(cold, approver_ids)
+        for approver_id in set(approver_ids):
+            await ApprovalService.get_approver_statistics(approver_id)
+        memoized = await timed(ApprovalService.get_approver_statistics, approver_ids)
+
+        assert await four_counts(db, approver_ids[0]) == await cold(approver_ids[0])
+
+        print(f"  4 x count_documents:   {format_summary(legacy)}")
+        print(f"  covered $group:        {format_summary(grouped)}")
+        print(f"  memoized:              {format_summary(memoized)}")
+
+        plan = await db.command(
+            "explain",
+            {
+                "aggregate": "approval_workflows",
+                "pipeline": [
+                    {"$match": {"approver_id": approver_ids[0]}},
+                    {"$project": {"_id": 0, "status": 1}},
+                    {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+                ],
+                "cursor": {}
+            },
+            verbosity="executionStats"
+        )
+        print(f"  documents examined by $group: {find_key(plan, 'totalDocsExamined')}")
+    finally:
+        if not keep:
+            await drop_bench_db()
+
+def find_key(document, key):
+    """First value of `key` anywhere in a nested explain document"""
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        values = document.values()
+    elif isinstance(document, list):
+        values = document
+    else:
+        return None
+    for value in values:
+        found = find_key(value, key)
+        if found is not None:
+            return found
+    return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workflows", type=int, default=1000000)
+    parser.add_argument("--approvers", type=int, default=2000)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded database for the next run")
+    args = parser.parse_args()
+    asyncio.run(main(args.workflows, args.approvers, args.samples, args.keep))
@@ -0,0 +1,34 @@
+"""Helpers shared by the benchmarks that need a MongoDB server"""
+from typing import Dict, List
+from motor.motor_asyncio import AsyncIOMotorClient
+from core.config import settings
+from core.database import db_instance
+import statistics
+
+def bench_db_name() -> str:
+    # Never the application database; benchmarks seed and drop their own
+    return f"{settings.DB_NAME}_bench"
+
+async def connect_bench_db():
+    """Point get_database() at a scratch database on MONGO_URL"""
+    db_instance.client = AsyncIOMotorClient(settings.MONGO_URL, tz_aware=True)
+    db_instance.db = db_instance.client[bench_db_name()]
+    await db_instance.client.admin.command("ping")
+    return db_instance.db
+
+async def drop_bench_db():
+    await db_instance.client.drop_database(bench_db_name())
+    db_instance.client.close()
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/max of timings given in seconds, in milliseconds"""
+    ordered = sorted(samples)
+    return {
+        "p50": statistics.median(ordered) * 1000,
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "max": ordered[-1] * 1000
+    }
+
+def format_summary(samples: List[float]) -> str:
+    summary = summarize(samples)
+    return f"p50 {summary['p50']:8.2f} ms   p95 {summary['p95']:8.2f} ms   max {summary['max']:8.2f} ms"
@@ -0,0 +1,67 @@
+"""Login throughput and event-loop responsiveness during bcrypt verification
+
+Simulates a burst of concurrent logins, each verifying a password at
+BCRYPT_ROUNDS, first inline on the event loop (the old behaviour) and then
+through the PasswordHashPool. A probe task sleeping 10 ms at a time records
+how late the loop wakes it, which is the delay every other request would see.
+
+    cd backend && python -m benchmarks.login_throughput --logins 40
+"""
+from core.config import settings
+from core.security import SecurityService, password_pool, pwd_context
+import argparse
+import asyncio
+import statistics
+import time
+
+PROBE_INTERVAL = 0.01
+
+async def probe(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - started - PROBE_INTERVAL)
+
+async def login_inline(password: str, hashed: str) -> bool:
+    return pwd_context.verify(password, hashed)
+
+async def login_pooled(password: str, hashed: str) -> bool:
+    return await SecurityService.verify_password_async(password, hashed)
+
+async def burst(login, count: int, hashed: str):
+    lags = []
+    stop = asyncio.Event()
+    probing = asyncio.create_task(probe(stop, lags))
+    await asyncio.sleep(PROBE_INTERVAL * 2)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login("User@123", hashed) for _ in range(count)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probing
+    assert all(results)
+    return elapsed, lags
+
+def report(label: str, count: int, elapsed: float, lags: list):
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(f"  {label:8} {count / elapsed:7.1f} logins/s   loop lag p50 {statistics.median(lags_ms):7.1f} ms"
+          f"   p99 {p99:7.1f} ms   max {lags_ms[-1]:7.1f} ms")
+
+async def main(count: int):
+    hashed = pwd_context.hash("User@123")
+    print(f"{count} concurrent logins, bcrypt rounds {settings.BCRYPT_ROUNDS}, "
+          f"{password_pool.max_workers} hash worker(s)")
+
+    elapsed, lags = await burst(login_inline, count, hashed)
+    report("inline", count, elapsed, lags)
+
+    elapsed, lags = await burst(login_pooled, count, hashed)
+    report("pooled", count, elapsed, lags)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins))
@@ -0,0 +1,94 @@
+"""Render time for NFA PDFs: stylesheet inline per document versus the warm PDFRenderer
+
+The cold path is how documents were rendered before the warm context: the
+full stylesheet embedded in every document and parsed, with font discovery,
+on each render. The warm path is pdf_renderer reusing one parsed CSS object
+and FontConfiguration.
+
+    cd backend && python -m benchmarks.pdf_render --documents 1000
+"""
+from datetime import datetime, timezone
+from weasyprint import HTML
+from tasks.pdf_tasks import NFA_PDF_CSS, PDFService, PDFRenderer
+import argparse
+import os
+import tempfile
+import time
+
+def sample_nfa(n: int):
+    nfa = {
+        "id": f"nfa-{n}",
+        "nfa_number": f"NFA/2025/{n + 1:04d}",
+        "created_at": datetime.now(timezone.utc),
+        "section1_data": {
+            "function_division": "Operations",
+            "location": "Greater Noida",
+            "requestor_name": f"Requestor {n}",
+            "cost_code": f"CC-{n % 50:03d}",
+            "department": ["Finance", "IT", "HR", "Purchasing"][n % 4],
+            "subject_item": f"Procurement request {n}",
+            "background_purpose": "Replacement of end-of-life equipment. " * 5,
+            "proposal_description": "Purchase and installation with three years of support. " * 5,
+            "amount_of_approval": 100000 + n * 250,
+            "currency": "INR",
+            "tax_status": "Excluding GST",
+            "budget_status": "Budgeted",
+            "budget_available_with_user": True,
+            "advance_payment_required": n % 3 == 0,
+            "advance_amount": 10000 if n % 3 == 0 else 0,
+            "proposed_work_schedule": "Q3"
+        },
+        "section2_data": {
+            "vendor_selection": True,
+            "num_vendors_evaluated": 3,
+            "vendor_name_proposed": f"Vendor {n % 20}",
+            "amount_of_approval": 98000 + n * 250,
+            "tax_status": "Excluding GST",
+            "comments": "Negotiated a 2% discount."
+        }
+    }
+    approvals = [
+        {
+            "section": section,
+            "sequence": sequence,
+            "approver_name": f"Approver {section}.{sequence}",
+            "approver_designation": "Manager",
+            "action_timestamp": datetime.now(timezone.utc)
+        }
+        for section in (1, 2)
+        for sequence in (1, 2, 3)
+    ]
+    return nfa, approvals
+
+def render_inline(html: str, target: str):
+    HTML(string=html.replace("</head>", f"<style>{NFA_PDF_CSS}</style></head>", 1)).write_pdf(target)
+
+def timed(render, documents, directory: str) -> float:
+    started = time.perf_counter()
+    for n, html in enumerate(documents):
+        render(html, os.path.join(directory, f"{n}.pdf"))
+    return time.perf_counter() - started
+
+def main(count: int):
+    documents = [PDFService.generate_nfa_html(*sample_nfa(n)) for n in range(count)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        cold = timed(render_inline, documents, directory)
+
+        renderer = PDFRenderer()
+        started = time.perf_counter()
+        renderer.warm()
+        warm_up = time.perf_counter() - started
+        warm = timed(renderer.render, documents, directory)
+
+    print(f"{count} NFA documents")
+    print(f"  inline stylesheet:  {cold:7.1f}s   {cold / count * 1000:7.1f} ms/document")
+    print(f"  warm renderer:      {warm:7.1f}s   {warm / count * 1000:7.1f} ms/document "
+          f"(+{warm_up * 1000:.0f} ms one-off warm-up)")
+    print(f"  speedup:            {cold / warm:7.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.documents)
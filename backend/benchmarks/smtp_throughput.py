@@ -0,0 +1,92 @@
+"""SMTP throughput: one connection per message versus the pooled SMTPPool
+
+Runs a local aiosmtpd sink and sends the same messages both ways. Pass
+--latency to simulate a remote relay's handshake cost on every command.
+
+    cd backend && python -m benchmarks.smtp_throughput --messages 500
+"""
+from email.message import EmailMessage
+from aiosmtpd.controller import Controller
+from core.config import settings
+from tasks.smtp_pool import SMTPPool
+import aiosmtplib
+import argparse
+import asyncio
+import socket
+import time
+
+class CountingSink:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.received = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        await asyncio.sleep(self.latency)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.latency)
+        self.received += 1
+        return "250 OK"
+
+def make_message(n: int) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = settings.EMAIL_FROM
+    message["To"] = f"approver{n}@example.com"
+    message["Subject"] = f"NFA Approval Required - {n}"
+    message.set_content("Please review")
+    return message
+
+async def send_unpooled(port: int, count: int, concurrency: int):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def send(n: int):
+        async with slots:
+            await aiosmtplib.send(make_message(n), hostname="127.0.0.1", port=port, start_tls=False)
+
+    await asyncio.gather(*(send(n) for n in range(count)))
+
+async def send_pooled(count: int, concurrency: int) -> SMTPPool:
+    pool = SMTPPool(concurrency, settings.SMTP_MAX_MESSAGES_PER_CONNECTION, settings.SMTP_IDLE_TIMEOUT_SECONDS)
+    await asyncio.gather(*(pool.send_message(make_message(n)) for n in range(count)))
+    await pool.close()
+    return pool
+
+async def main(count: int, concurrency: int, latency: float):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    sink = CountingSink(latency)
+    controller = Controller(sink, hostname="127.0.0.1", port=port)
+    controller.start()
+    settings.EMAIL_HOST, settings.EMAIL_PORT = "127.0.0.1", port
+    settings.EMAIL_USERNAME = settings.EMAIL_PASSWORD = ""
+    settings.EMAIL_START_TLS = False
+
+    try:
+        started = time.perf_counter()
+        await send_unpooled(port, count, concurrency)
+        unpooled = time.perf_counter() - started
+
+        started = time.perf_counter()
+        pool = await send_pooled(count, concurrency)
+        pooled = time.perf_counter() - started
+    finally:
+        controller.stop()
+
+    print(f"{count} messages, concurrency {concurrency}, {latency * 1000:.0f} ms simulated relay latency")
+    print(f"  connect per message: {count / unpooled:8.1f} msg/s ({unpooled:.2f}s)")
+    print(f"  pooled:              {count / pooled:8.1f} msg/s ({pooled:.2f}s), "
+          f"{pool.connections_opened} connection(s) opened")
+    print(f"  speedup:             {unpooled / pooled:8.1f}x")
+    assert sink.received == 2 * count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=settings.SMTP_POOL_SIZE)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds added to EHLO and DATA")
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.concurrency, args.latency))
@@ -0,0 +1,78 @@
+"""Celery task throughput with and without the per-process worker runtime
+
+Runs the same task body, one NFA lookup, back to back as a worker process
+would: first the old way, with a fresh event loop and Motor client per task,
+then through the shared WorkerRuntime loop and pooled client. Uses a scratch
+<DB_NAME>_bench database on MONGO_URL.
+
+    cd backend && python -m benchmarks.worker_runtime --tasks 500
+"""
+from motor.motor_asyncio import AsyncIOMotorClient
+from benchmarks.common import bench_db_name
+from core.config import settings
+from core.database import db_instance, get_database
+from tasks.runtime import runtime
+import argparse
+import asyncio
+import time
+
+NFA_IDS = [f"nfa-{n}" for n in range(100)]
+
+def task_per_loop(nfa_id: str):
+    """A task as written before the runtime: its own loop and client"""
+    async def body():
+        client = AsyncIOMotorClient(settings.MONGO_URL, tz_aware=True)
+        try:
+            return await client[settings.DB_NAME].nfa_requests.find_one({"id": nfa_id}, {"_id": 0})
+        finally:
+            client.close()
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(body())
+    finally:
+        loop.close()
+
+def task_on_runtime(nfa_id: str):
+    async def body():
+        db = await get_database()
+        return await db.nfa_requests.find_one({"id": nfa_id}, {"_id": 0})
+
+    return runtime.run(body())
+
+def throughput(task, count: int) -> float:
+    started = time.perf_counter()
+    for n in range(count):
+        assert task(NFA_IDS[n % len(NFA_IDS)]) is not None
+    return count / (time.perf_counter() - started)
+
+async def seed():
+    db = await get_database()
+    await db.nfa_requests.drop()
+    await db.nfa_requests.insert_many([{"id": nfa_id, "status": "approved"} for nfa_id in NFA_IDS])
+    await db.nfa_requests.create_index("id", unique=True)
+
+async def drop():
+    await db_instance.client.drop_database(settings.DB_NAME)
+
+def main(count: int):
+    settings.DB_NAME = bench_db_name()
+    runtime.start()
+    try:
+        runtime.run(seed())
+        before = throughput(task_per_loop, count)
+        after = throughput(task_on_runtime, count)
+    finally:
+        runtime.run(drop())
+        runtime.stop()
+
+    print(f"{count} tasks, each one NFA lookup")
+    print(f"  loop + client per task: {before:8.1f} tasks/s")
+    print(f"  worker runtime:         {after:8.1f} tasks/s")
+    print(f"  speedup:                {after / before:8.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=500)
+    args = parser.parse_args()
+    main(args.tasks)
@@ -15,6 +15,12 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 60  # how long other API workers may keep honouring a revoked token
+    
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
     
     # Email
     EMAIL_HOST: str
@@ -23,16 +29,62 @@ class Settings(BaseSettings):
     EMAIL_PASSWORD: str
     EMAIL_FROM: str
     EMAIL_FROM_NAME: str = "HCIL NFA System"
+    EMAIL_START_TLS: bool = True  # disable for a plain local SMTP sink
+    
+    # Pooled SMTP connections per Celery worker process
+    SMTP_POOL_SIZE: int = 4
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100
+    SMTP_IDLE_TIMEOUT_SECONDS: int = 60
+    
+    # SMTP throttling and retries per worker process (rate 0 disables throttling)
+    SMTP_RATE_PER_SECOND: float = 5
+    SMTP_RATE_BURST: int = 10
+    SMTP_MAX_RETRIES: int = 4
+    SMTP_BACKOFF_BASE_SECONDS: float = 1
+    SMTP_BACKOFF_MAX_SECONDS: float = 30
+    MAIL_METRICS_INTERVAL_SECONDS: int = 15  # how often each worker process publishes its mail counters
+    
+    # Approval notification digests (users opt in; urgent amounts bypass the window)
+    APPROVAL_DIGEST_ENABLED: bool = False
+    APPROVAL_DIGEST_WINDOW_SECONDS: int = 900
+    APPROVAL_DIGEST_URGENT_AMOUNT: float = 1000000
+    
+    # User directory cache
+    USER_CACHE_SIZE: int = 5000
+    USER_CACHE_TTL_SECONDS: int = 300
+    
+    # Approver statistics memo (0 disables)
+    APPROVER_STATS_TTL_SECONDS: int = 5
+    
+    # Admin statistics cache (0 disables)
+    ADMIN_STATS_TTL_SECONDS: int = 5
+    
+    # Report result cache: fresh for TTL, then served stale while it refreshes
+    REPORT_CACHE_SIZE: int = 256
+    REPORT_CACHE_TTL_SECONDS: int = 60
+    REPORT_CACHE_STALE_SECONDS: int = 300
+    
+    # Batch size for cursors feeding reports and exports
+    REPORT_BATCH_SIZE: int = 5000
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Mongo connection pool per Celery worker process
+    WORKER_MONGO_POOL_SIZE: int = 10
+    
     # CORS
     CORS_ORIGINS: str = "*"
     
     # Upload
     MAX_UPLOAD_SIZE: int = 10485760  # 10MB
     
+    # Email attachments: encoded parts are cached; larger files are sent as signed links
+    APP_BASE_URL: str = "https://approval-flow-33.preview.emergentagent.com"
+    ATTACHMENT_CACHE_SIZE: int = 32
+    ATTACHMENT_LINK_THRESHOLD_BYTES: int = 5242880  # 5MB
+    DOWNLOAD_LINK_TTL_SECONDS: int = 604800  # 7 days
+    
     # SuperAdmin
     SUPERADMIN_USERNAME: str
     SUPERADMIN_PASSWORD: str
@@ -1,5 +1,9 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
 from core.config import settings
+from core.timestamps import load_timestamp_state, backfill_bson_timestamps
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -7,6 +11,8 @@ logger = logging.getLogger(__name__)
 class Database:
     client: AsyncIOMotorClient = None
     db = None
+    timestamp_backfill: asyncio.Task = None
+    rollup_rebuild: asyncio.Task = None
 
 db_instance = Database()
 
@@ -15,7 +21,7 @@ async def get_database():
 
 async def init_db():
     try:
-        db_instance.client = AsyncIOMotorClient(settings.MONGO_URL)
+        db_instance.client = AsyncIOMotorClient(settings.MONGO_URL, tz_aware=True)
         db_instance.db = db_instance.client[settings.DB_NAME]
         
         # Test connection
@@ -25,6 +31,26 @@ async def init_db():
         # Create indexes
         await create_indexes()
         
+        # Seed NFA number counters on first start after upgrade
+        from services.nfa_service import NFAService, NFA_COUNTER_PREFIX
+        if not await db_instance.db.counters.find_one({"_id": {"$regex": f"^{NFA_COUNTER_PREFIX}"}}):
+            await NFAService.seed_nfa_counters()
+        
+        # Check whether legacy ISO-string timestamps remain
+        legacy_timestamps = await load_timestamp_state(db_instance.db)
+        
+        # Build derived collections on first start after upgrade
+        from services.user_stats_service import UserStatsService
+        await run_once("user_stats", UserStatsService.rebuild_user_stats)
+        await run_once("approval_durations", NFAService.backfill_approval_durations)
+        
+        # Rollups take a full scan of both source collections; build them without holding up startup
+        db_instance.rollup_rebuild = asyncio.create_task(run_rollup_rebuild())
+        
+        # Convert them in the background; reads accept both meanwhile
+        if legacy_timestamps:
+            db_instance.timestamp_backfill = asyncio.create_task(run_timestamp_backfill())
+        
         # Initialize superadmin
         from services.auth_service import AuthService
         await AuthService.create_superadmin()
@@ -33,32 +59,144 @@ async def init_db():
         logger.error(f"Failed to connect to MongoDB: {e}")
         raise
 
-async def create_indexes():
-    """Create database indexes for performance"""
-    db = db_instance.db
+# Declarative index spec per collection. Keys mirror the real query shapes used
+# by the services so every `find_one({"id": ...})` and list query is index-backed.
+INDEX_SPECS = {
+    "users": [
+        {"keys": [("id", 1)], "unique": True},
+        {"keys": [("username", 1)], "unique": True},
+        {"keys": [("email", 1)]},
+        {"keys": [("created_at", -1), ("id", -1)]},
+    ],
+    "nfa_requests": [
+        {"keys": [("id", 1)], "unique": True},
+        {"keys": [("nfa_number", 1)], "unique": True, "sparse": True},
+        {"keys": [("requestor_id", 1), ("created_at", -1), ("id", -1)]},
+        {"keys": [("status", 1), ("created_at", -1), ("id", -1)]},
+        {"keys": [("created_at", -1), ("id", -1)]},
+        # Completion stamps with their durations, so windowed averages are covered
+        {"keys": [("section1_completed_at", -1), ("section1_duration_seconds", 1)], "sparse": True},
+        {"keys": [("section2_completed_at", -1), ("section2_duration_seconds", 1)], "sparse": True},
+        {"keys": [("finalized_at", -1), ("total_duration_seconds", 1)], "sparse": True},
+    ],
+    "approval_workflows": [
+        {"keys": [("id", 1)], "unique": True},
+        {"keys": [("nfa_id", 1), ("section", 1), ("sequence", 1)]},
+        # Also covers get_approver_statistics via its (approver_id, status) prefix
+        {"keys": [("approver_id", 1), ("status", 1), ("created_at", -1)]},
+        {"keys": [("status", 1)]},
+        # Windowed scans for the cycle-time report
+        {"keys": [("created_at", -1)]},
+    ],
+    "vendors": [
+        {"keys": [("id", 1)], "unique": True},
+        {"keys": [("name", 1), ("id", 1)]},
+        {"keys": [("status", 1), ("name", 1), ("id", 1)]},
+    ],
+    "mail_dead_letters": [
+        {"keys": [("id", 1)], "unique": True},
+        {"keys": [("failed_at", -1)]},
+    ],
+    # One document per worker process; a process killed without shutting down expires after a day
+    "mail_metrics": [
+        {"keys": [("updated_at", 1)], "expireAfterSeconds": 86400},
+    ],
+    "attachments": [
+        {"keys": [("id", 1)], "unique": True},
+        {"keys": [("nfa_id", 1)]},
+    ],
+    "nfa_daily_rollups": [
+        {
+            "keys": [("day", 1), ("status", 1), ("department", 1), ("vendor_id", 1), ("currency", 1)],
+            "unique": True
+        },
+    ],
+    "approval_daily_rollups": [
+        {"keys": [("day", 1), ("approver_id", 1), ("status", 1)], "unique": True},
+    ],
+}
+
+def _index_options(spec: dict) -> dict:
+    return {k: v for k, v in spec.items() if k != "keys"}
+
+async def reconcile_indexes(collection_name: str, specs: list):
+    """Diff the declared indexes against the live ones and build what is missing"""
+    collection = db_instance.db[collection_name]
+    live = await collection.index_information()
+    live_by_keys = {tuple(tuple(k) for k in info["key"]): (name, info) for name, info in live.items()}
     
-    # Users indexes
-    await db.users.create_index("username", unique=True)
-    await db.users.create_index("email")
+    missing = []
+    declared_keys = set()
+    for spec in specs:
+        keys = tuple(tuple(k) for k in spec["keys"])
+        declared_keys.add(keys)
+        options = _index_options(spec)
+        
+        if keys not in live_by_keys:
+            missing.append(IndexModel(spec["keys"], background=True, **options))
+            continue
+        
+        name, info = live_by_keys[keys]
+        for option, expected in options.items():
+            if info.get(option, False) != expected:
+                logger.warning(
+                    f"Index drift on {collection_name}.{name}: {option}={info.get(option, False)}, expected {expected}"
+                )
     
-    # NFA indexes
-    await db.nfa_requests.create_index("nfa_number", unique=True, sparse=True)
-    await db.nfa_requests.create_index("requestor_id")
-    await db.nfa_requests.create_index("status")
-    await db.nfa_requests.create_index("created_at")
+    for keys, (name, _) in live_by_keys.items():
+        if name != "_id_" and keys not in declared_keys:
+            logger.warning(f"Index drift on {collection_name}.{name}: not declared in INDEX_SPECS")
     
-    # Approval workflows indexes
-    await db.approval_workflows.create_index([("nfa_id", 1), ("section", 1), ("sequence", 1)])
-    await db.approval_workflows.create_index("approver_id")
-    await db.approval_workflows.create_index("status")
+    if missing:
+        try:
+            created = await collection.create_indexes(missing)
+            logger.info(f"Created indexes on {collection_name}: {', '.join(created)}")
+        except OperationFailure as e:
+            logger.error(f"Failed to build indexes on {collection_name}: {e}")
+
+async def create_indexes():
+    """Reconcile database indexes against INDEX_SPECS"""
+    for collection_name, specs in INDEX_SPECS.items():
+        await reconcile_indexes(collection_name, specs)
     
-    # Vendors indexes
-    await db.vendors.create_index("name")
-    await db.vendors.create_index("status")
+    logger.info("Database indexes reconciled")
+
+async def run_once(migration_id: str, migrate):
+    """Run a one-off data migration unless the migrations collection records it as done"""
+    if await db_instance.db.migrations.find_one({"_id": migration_id, "completed": True}):
+        return
     
-    logger.info("Database indexes created")
+    await migrate()
+    await db_instance.db.migrations.update_one(
+        {"_id": migration_id},
+        {"$set": {"completed": True}},
+        upsert=True
+    )
+    logger.info(f"Migration complete: {migration_id}")
+
+async def run_timestamp_backfill():
+    try:
+        await backfill_bson_timestamps(db_instance.db)
+    except asyncio.CancelledError:
+        logger.info("BSON timestamp backfill interrupted; it will resume on next start")
+        raise
+    except Exception as e:
+        logger.error(f"BSON timestamp backfill failed: {e}")
+
+async def run_rollup_rebuild():
+    from services.rollup_service import RollupService
+    try:
+        await run_once("analytics_rollups", RollupService.rebuild_rollups)
+    except asyncio.CancelledError:
+        logger.info("Analytics rollup build interrupted; it will rerun on next start")
+        raise
+    except Exception as e:
+        logger.error(f"Analytics rollup build failed: {e}")
 
 async def close_db():
+    for task in (db_instance.timestamp_backfill, db_instance.rollup_rebuild):
+        if task and not task.done():
+            task.cancel()
     if db_instance.client:
         db_instance.client.close()
         logger.info("MongoDB connection closed")
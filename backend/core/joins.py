@@ -0,0 +1,44 @@
+from typing import Any, Dict, Iterable, List, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+async def fetch_by_ids(
+    collection: AsyncIOMotorCollection,
+    ids: Iterable[Any],
+    projection: Optional[Dict[str, Any]] = None,
+    key: str = "id"
+) -> Dict[Any, Dict[str, Any]]:
+    """Fetch documents for a set of keys with a single $in query, keyed by `key`"""
+    unique_ids = list(dict.fromkeys(i for i in ids if i is not None))
+    if not unique_ids:
+        return {}
+
+    fields = {"_id": 0}
+    if projection:
+        fields.update(projection)
+        # Inclusion projections must still return the join key
+        if any(v for k, v in projection.items() if k != "_id"):
+            fields[key] = 1
+
+    docs = await collection.find({key: {"$in": unique_ids}}, fields).to_list(len(unique_ids))
+    return {doc[key]: doc for doc in docs}
+
+async def attach_related(
+    items: List[Dict[str, Any]],
+    foreign_key: str,
+    collection: AsyncIOMotorCollection,
+    as_field: str,
+    projection: Optional[Dict[str, Any]] = None,
+    key: str = "id"
+) -> List[Dict[str, Any]]:
+    """Batch-join related documents onto `items` in place, preserving their order
+
+    Items whose related document does not exist are left without `as_field`.
+    """
+    related = await fetch_by_ids(collection, (item.get(foreign_key) for item in items), projection, key)
+
+    for item in items:
+        doc = related.get(item.get(foreign_key))
+        if doc is not None:
+            item[as_field] = doc
+
+    return items
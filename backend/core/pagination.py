@@ -0,0 +1,80 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime
+from core.timestamps import TIMESTAMP_FIELDS, timestamp_state
+import base64
+import json
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+TIMESTAMP_FIELD_NAMES = {field for fields in TIMESTAMP_FIELDS.values() for field in fields}
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode keyset values into an opaque cursor"""
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode an opaque cursor back into keyset values"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+
+    return [_decode_value(v) for v in values]
+
+def _after(field: str, direction: int, value: Any) -> Dict[str, Any]:
+    """Condition for `field` strictly after `value` in sort order
+
+    Range operators only compare values of the same BSON type, while sorts put
+    every string before every date. Until the timestamp backfill completes, a
+    cursor on a timestamp field also has to reach the legacy ISO strings on the
+    far side of that boundary.
+    """
+    condition = {field: {"$lt" if direction < 0 else "$gt": value}}
+    if not (timestamp_state.legacy and field in TIMESTAMP_FIELD_NAMES):
+        return condition
+    if isinstance(value, datetime) and direction < 0:
+        return {"$or": [condition, {field: {"$type": "string"}}]}
+    if isinstance(value, str) and direction > 0:
+        return {"$or": [condition, {field: {"$type": "date"}}]}
+    return condition
+
+def keyset_filter(sort: List[Tuple[str, int]], cursor: str) -> Dict[str, Any]:
+    """Build a query matching documents strictly after the cursor in sort order"""
+    values = decode_cursor(cursor, len(sort))
+
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {prev_field: values[j] for j, (prev_field, _) in enumerate(sort[:i])}
+        clause.update(_after(field, direction, values[i]))
+        clauses.append(clause)
+
+    return {"$or": clauses}
+
+def apply_keyset(query: Dict[str, Any], sort: List[Tuple[str, int]], cursor: Optional[str]) -> Dict[str, Any]:
+    """Combine a base query with the keyset condition for a cursor"""
+    if not cursor:
+        return query
+    keyset = keyset_filter(sort, cursor)
+    return {"$and": [query, keyset]} if query else keyset
+
+def next_cursor(items: List[Dict[str, Any]], sort: List[Tuple[str, int]], limit: int) -> Optional[str]:
+    """Cursor for the page after `items`, or None when this is the last page"""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor([last.get(field) for field, _ in sort])
@@ -1,14 +1,141 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from core.config import settings
+from core.database import get_database
+import asyncio
+import hashlib
+import hmac
+import threading
+import time
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min/max rounds to the configured cost makes hashes created with a
+# different cost report needs_update, so they are rehashed on the next login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
 security = HTTPBearer()
 
+DOWNLOAD_SIGNATURE_PREFIX = "nfa-pdf:"
+
+class PasswordHashPool:
+    """Bounded thread pool that keeps bcrypt work off the event loop"""
+    
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+    
+    def _tracked(self, fn: Callable, *args):
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+    
+    async def run(self, fn: Callable, *args):
+        with self._lock:
+            self._queued += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._tracked, fn, *args)
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queue_depth": self._queued,
+                "active": self._active,
+                "completed": self._completed
+            }
+
+password_pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS)
+
+class TokenCache:
+    """Bounded LRU of verified JWT claims keyed by token digest
+    
+    Entries are held until `exp` or for `ttl` seconds, whichever is sooner.
+    Revocations are stored on the user document and checked on every miss, so
+    a revocation made in one API worker reaches the others within `ttl`.
+    """
+    
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._user_digests: Dict[str, set] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+    
+    def _evict(self, digest: str):
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return
+        user_id = entry[1]["user_id"]
+        digests = self._user_digests.get(user_id)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._user_digests[user_id]
+    
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        digest = self._digest(token)
+        entry = self._entries.get(digest)
+        
+        if entry is None or entry[0] <= time.time():
+            self._evict(digest)
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return entry[1]
+    
+    def put(self, token: str, payload: Dict[str, Any]):
+        digest = self._digest(token)
+        expires_at = min(payload.get("exp", 0), time.time() + self.ttl)
+        self._entries[digest] = (expires_at, payload)
+        self._entries.move_to_end(digest)
+        self._user_digests.setdefault(payload["user_id"], set()).add(digest)
+        
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._evict(oldest)
+    
+    def invalidate_user(self, user_id: str):
+        """Drop this process's cached claims for a user"""
+        for digest in list(self._user_digests.get(user_id, ())):
+            self._evict(digest)
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL_SECONDS)
+
 class SecurityService:
     @staticmethod
     def hash_password(password: str) -> str:
@@ -18,6 +145,32 @@ class SecurityService:
     def verify_password(plain_password: str, hashed_password: str) -> bool:
         return pwd_context.verify(plain_password, hashed_password)
     
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        return await password_pool.run(pwd_context.hash, password)
+    
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        return await password_pool.run(pwd_context.verify, plain_password, hashed_password)
+    
+    @staticmethod
+    async def verify_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password and return a new hash if the stored one uses an outdated cost"""
+        return await password_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+    
+    @staticmethod
+    def sign_download(resource: str, expires: int) -> str:
+        """HMAC signature authorising download of `resource` until the `expires` epoch second"""
+        # Prefixed so a download signature can never double as an HMAC for anything else keyed by JWT_SECRET_KEY
+        message = f"{DOWNLOAD_SIGNATURE_PREFIX}{resource}:{expires}".encode()
+        return hmac.new(settings.JWT_SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+    
+    @staticmethod
+    def verify_download(resource: str, expires: int, signature: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(SecurityService.sign_download(resource, expires), signature)
+    
     @staticmethod
     def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
         to_encode = data.copy()
@@ -26,7 +179,7 @@ class SecurityService:
         else:
             expire = datetime.now(timezone.utc) + timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
         
-        to_encode.update({"exp": expire})
+        to_encode.update({"exp": expire, "iat": datetime.now(timezone.utc)})
         encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
         return encoded_jwt
     
@@ -42,17 +195,31 @@ class SecurityService:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
+async def is_token_revoked(payload: Dict[str, Any]) -> bool:
+    """True if the token's user is gone or revoked their tokens at or after it was issued"""
+    db = await get_database()
+    user = await db.users.find_one({"id": payload["user_id"]}, {"_id": 0, "tokens_valid_after": 1})
+    if user is None:
+        return True
+    valid_after = user.get("tokens_valid_after")
+    return valid_after is not None and payload.get("iat", 0) <= valid_after
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
     token = credentials.credentials
-    payload = SecurityService.decode_token(token)
     
-    if payload.get("user_id") is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials"
-        )
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = SecurityService.decode_token(token)
+        
+        if payload.get("user_id") is None or await is_token_revoked(payload):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication credentials"
+            )
+        
+        token_cache.put(token, payload)
     
-    return payload
+    return dict(payload)
 
 def require_role(required_roles: list):
     def role_checker(current_user: Dict = Depends(get_current_user)):
@@ -0,0 +1,129 @@
+from typing import Any, Dict, Optional
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Timestamp fields that used to be stored as ISO strings
+TIMESTAMP_FIELDS = {
+    "users": ["created_at", "updated_at"],
+    "nfa_requests": ["created_at", "updated_at"],
+    "approval_workflows": ["created_at", "action_timestamp"],
+    "vendors": ["created_at", "updated_at"],
+    "attachments": ["created_at"],
+}
+
+MIGRATION_ID = "bson_timestamps"
+
+class TimestampState:
+    # True until the backfill has converted every legacy ISO-string timestamp.
+    # While set, range filters match both representations.
+    legacy = True
+
+timestamp_state = TimestampState()
+
+def to_datetime(value: Any) -> Optional[datetime]:
+    """Read a timestamp stored either as a BSON date or a legacy ISO string"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def format_date(value: Any, default: str = "") -> str:
+    """Format a stored timestamp as YYYY-MM-DD"""
+    dt = to_datetime(value)
+    return dt.strftime("%Y-%m-%d") if dt else default
+
+def seconds_between(start: Any, end: Any) -> Optional[int]:
+    """Whole seconds between two stored timestamps, or None if either is missing"""
+    start, end = to_datetime(start), to_datetime(end)
+    if not start or not end:
+        return None
+    return int((end - start).total_seconds())
+
+def since(field: str, start: datetime) -> Dict[str, Any]:
+    """Filter for `field >= start` that also matches legacy string timestamps"""
+    if not timestamp_state.legacy:
+        return {field: {"$gte": start}}
+    return {
+        "$or": [
+            {field: {"$gte": start}},
+            {field: {"$gte": start.isoformat(), "$type": "string"}}
+        ]
+    }
+
+def until(field: str, end: datetime) -> Dict[str, Any]:
+    """Filter for `field <= end` that also matches legacy string timestamps"""
+    if not timestamp_state.legacy:
+        return {field: {"$lte": end}}
+    return {
+        "$or": [
+            {field: {"$lte": end}},
+            {field: {"$lte": end.isoformat(), "$type": "string"}}
+        ]
+    }
+
+def date_expr(field: str) -> Any:
+    """Aggregation expression yielding `field` as a date"""
+    if not timestamp_state.legacy:
+        return f"${field}"
+    return {"$toDate": f"${field}"}
+
+async def load_timestamp_state(db):
+    """Pick up whether the BSON timestamp backfill has already completed"""
+    migration = await db.migrations.find_one({"_id": MIGRATION_ID})
+    timestamp_state.legacy = not (migration and migration.get("completed"))
+    return timestamp_state.legacy
+
+async def backfill_bson_timestamps(db, batch_size: int = 500, pause: float = 0.05):
+    """Convert legacy ISO-string timestamps to BSON dates in small online batches
+
+    Walks each collection in _id order so unparseable values are skipped rather
+    than retried, and yields between batches to stay gentle on a live system.
+    """
+    for collection_name, fields in TIMESTAMP_FIELDS.items():
+        collection = db[collection_name]
+        string_query = {"$or": [{f: {"$type": "string"}} for f in fields]}
+        projection = {f: 1 for f in fields}
+        last_id = None
+        converted = 0
+
+        while True:
+            query = string_query if last_id is None else {"$and": [string_query, {"_id": {"$gt": last_id}}]}
+            docs = await collection.find(query, projection).sort("_id", 1).limit(batch_size).to_list(batch_size)
+            if not docs:
+                break
+
+            ops = []
+            for doc in docs:
+                update = {}
+                for field in fields:
+                    if isinstance(doc.get(field), str):
+                        try:
+                            update[field] = to_datetime(doc[field])
+                        except ValueError:
+                            logger.warning(f"Unparseable {collection_name}.{field} on {doc['_id']}: {doc[field]!r}")
+                if update:
+                    ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+
+            if ops:
+                await collection.bulk_write(ops, ordered=False)
+                converted += len(ops)
+
+            last_id = docs[-1]["_id"]
+            await asyncio.sleep(pause)
+
+        logger.info(f"Converted timestamps on {converted} {collection_name} document(s)")
+
+    await db.migrations.update_one(
+        {"_id": MIGRATION_ID},
+        {"$set": {"completed": True, "completed_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+    timestamp_state.legacy = False
+    logger.info("BSON timestamp backfill complete")
@@ -54,6 +54,7 @@ class UserBase(BaseModel):
     location: Optional[str] = None
     function: Optional[str] = None
     roles: List[UserRole] = [UserRole.REQUESTOR]
+    approval_digest: bool = False  # batch approval requests into periodic digest emails
 
 class UserCreate(UserBase):
     password: str
@@ -67,6 +68,7 @@ class UserUpdate(BaseModel):
     function: Optional[str] = None
     roles: Optional[List[UserRole]] = None
     password: Optional[str] = None
+    approval_digest: Optional[bool] = None
 
 class UserResponse(UserBase):
     id: str
@@ -162,6 +164,12 @@ class NFAResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     pdf_url: Optional[str] = None
+    section1_completed_at: Optional[datetime] = None
+    section2_completed_at: Optional[datetime] = None
+    finalized_at: Optional[datetime] = None
+    section1_duration_seconds: Optional[int] = None
+    section2_duration_seconds: Optional[int] = None
+    total_duration_seconds: Optional[int] = None
 
 # Approval Models
 class ApprovalWorkflowCreate(BaseModel):
@@ -191,6 +199,7 @@ class ApprovalWorkflowResponse(BaseModel):
     comments: Optional[str] = None
     action_timestamp: Optional[datetime] = None
     created_at: datetime
+    nfa: Optional[Dict[str, Any]] = None
 
 # Vendor Models
 class VendorCreate(BaseModel):
@@ -23,6 +23,10 @@ async def seed_database():
     await db.nfa_requests.delete_many({})
     await db.approval_workflows.delete_many({})
     await db.attachments.delete_many({})
+    await db.counters.delete_many({})
+    await db.user_stats.delete_many({})
+    await db.nfa_daily_rollups.delete_many({})
+    await db.approval_daily_rollups.delete_many({})
     
     # Seed Users
     print("👥 Creating users...")
@@ -39,8 +43,8 @@ async def seed_database():
             "function": "Financial Planning",
             "roles": ["requestor", "approver"],
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": "user_002",
@@ -54,8 +58,8 @@ async def seed_database():
             "function": "Procurement",
             "roles": ["requestor", "approver", "coordinator"],
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": "user_003",
@@ -69,8 +73,8 @@ async def seed_database():
             "function": "Information Technology",
             "roles": ["requestor", "approver"],
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": "user_004",
@@ -84,8 +88,8 @@ async def seed_database():
             "function": "Vendor Relations",
             "roles": ["coordinator"],
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": "user_005",
@@ -99,8 +103,8 @@ async def seed_database():
             "function": "Executive",
             "roles": ["approver", "central_reviewer"],
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": "user_006",
@@ -114,8 +118,8 @@ async def seed_database():
             "function": "Brand Management",
             "roles": ["requestor"],
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         }
     ]
     
@@ -134,8 +138,8 @@ async def seed_database():
             "phone": "+91-9876543210",
             "address": "Bangalore, Karnataka",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": "vendor_002",
@@ -146,8 +150,8 @@ async def seed_database():
             "phone": "+91-9876543211",
             "address": "Mumbai, Maharashtra",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": "vendor_003",
@@ -158,8 +162,8 @@ async def seed_database():
             "phone": "+91-9876543212",
             "address": "Pune, Maharashtra",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": "vendor_004",
@@ -170,8 +174,8 @@ async def seed_database():
             "phone": "+91-9876543213",
             "address": "Hyderabad, Telangana",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": "vendor_005",
@@ -182,8 +186,8 @@ async def seed_database():
             "phone": "+91-9876543214",
             "address": "Gurgaon, Haryana",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         }
     ]
     
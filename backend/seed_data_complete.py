@@ -39,6 +39,7 @@ async def seed_database():
     await db.nfa_requests.delete_many({})
     await db.approval_workflows.delete_many({})
     await db.attachments.delete_many({})
+    await db.counters.delete_many({})
     
     # Create Users
     print("👥 Creating users...")
@@ -55,7 +56,7 @@ async def seed_database():
             "function": "Administration",
             "roles": ["superadmin", "approver", "coordinator", "central_reviewer", "requestor"],
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "id": generate_id(),
@@ -69,7 +70,7 @@ async def seed_database():
             "function": "Finance & Accounts",
             "roles": ["requestor", "approver"],
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "id": generate_id(),
@@ -83,7 +84,7 @@ async def seed_database():
             "function": "Manufacturing",
             "roles": ["requestor", "approver"],
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "id": generate_id(),
@@ -97,7 +98,7 @@ async def seed_database():
             "function": "Procurement",
             "roles": ["coordinator", "approver"],
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "id": generate_id(),
@@ -111,7 +112,7 @@ async def seed_database():
             "function": "Finance & Accounts",
             "roles": ["central_reviewer", "approver"],
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "id": generate_id(),
@@ -125,7 +126,7 @@ async def seed_database():
             "function": "Information Technology",
             "roles": ["requestor"],
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "id": generate_id(),
@@ -139,7 +140,7 @@ async def seed_database():
             "function": "Human Resources",
             "roles": ["requestor", "approver"],
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         }
     ]
     
@@ -158,7 +159,7 @@ async def seed_database():
             "phone": "+91 11 4567 8900",
             "address": "Cyber City, Gurgaon, Haryana - 122002",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "id": generate_id(),
@@ -169,7 +170,7 @@ async def seed_database():
             "phone": "+91 22 8765 4321",
             "address": "Andheri East, Mumbai, Maharashtra - 400069",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "id": generate_id(),
@@ -180,7 +181,7 @@ async def seed_database():
             "phone": "+91 80 9876 5432",
             "address": "Whitefield, Bangalore, Karnataka - 560066",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "id": generate_id(),
@@ -191,7 +192,7 @@ async def seed_database():
             "phone": "+91 79 2345 6789",
             "address": "GIDC, Ahmedabad, Gujarat - 382424",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "id": generate_id(),
@@ -202,7 +203,7 @@ async def seed_database():
             "phone": "+91 20 3456 7890",
             "address": "Hinjewadi, Pune, Maharashtra - 411057",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "id": generate_id(),
@@ -213,7 +214,7 @@ async def seed_database():
             "phone": "+91 11 5678 9012",
             "address": "Connaught Place, New Delhi - 110001",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         },
         {
             "id": generate_id(),
@@ -224,7 +225,7 @@ async def seed_database():
             "phone": "+91 44 8901 2345",
             "address": "Guindy, Chennai, Tamil Nadu - 600032",
             "status": "inactive",
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         }
     ]
     
@@ -297,8 +298,8 @@ async def seed_database():
                 {"user_id": sarah["id"], "name": sarah["name"], "sequence": 2, "role": "Central Reviewer"}
             ]
         },
-        "created_at": (datetime.now(timezone.utc) - timedelta(days=15)).isoformat(),
-        "updated_at": (datetime.now(timezone.utc) - timedelta(days=5)).isoformat(),
+        "created_at": (datetime.now(timezone.utc) - timedelta(days=15)),
+        "updated_at": (datetime.now(timezone.utc) - timedelta(days=5)),
         "pdf_url": None
     }
     nfas.append(nfa1)
@@ -340,8 +341,8 @@ async def seed_database():
                 {"user_id": jane["id"], "name": jane["name"], "sequence": 2}
             ]
         },
-        "created_at": (datetime.now(timezone.utc) - timedelta(days=3)).isoformat(),
-        "updated_at": (datetime.now(timezone.utc) - timedelta(days=3)).isoformat(),
+        "created_at": (datetime.now(timezone.utc) - timedelta(days=3)),
+        "updated_at": (datetime.now(timezone.utc) - timedelta(days=3)),
         "pdf_url": None
     }
     nfas.append(nfa2)
@@ -384,8 +385,8 @@ async def seed_database():
                 {"user_id": jane["id"], "name": jane["name"], "sequence": 2}
             ]
         },
-        "created_at": (datetime.now(timezone.utc) - timedelta(days=7)).isoformat(),
-        "updated_at": (datetime.now(timezone.utc) - timedelta(days=2)).isoformat(),
+        "created_at": (datetime.now(timezone.utc) - timedelta(days=7)),
+        "updated_at": (datetime.now(timezone.utc) - timedelta(days=2)),
         "pdf_url": None
     }
     nfas.append(nfa3)
@@ -411,8 +412,8 @@ async def seed_database():
             "currency": "INR",
             "amount_of_approval": 800000.00
         },
-        "created_at": (datetime.now(timezone.utc) - timedelta(days=1)).isoformat(),
-        "updated_at": (datetime.now(timezone.utc) - timedelta(days=1)).isoformat(),
+        "created_at": (datetime.now(timezone.utc) - timedelta(days=1)),
+        "updated_at": (datetime.now(timezone.utc) - timedelta(days=1)),
         "pdf_url": None
     }
     nfas.append(nfa4)
@@ -465,8 +466,8 @@ async def seed_database():
                 {"user_id": sarah["id"], "name": sarah["name"], "sequence": 1, "role": "Central Reviewer"}
             ]
         },
-        "created_at": (datetime.now(timezone.utc) - timedelta(days=10)).isoformat(),
-        "updated_at": (datetime.now(timezone.utc) - timedelta(days=1)).isoformat(),
+        "created_at": (datetime.now(timezone.utc) - timedelta(days=10)),
+        "updated_at": (datetime.now(timezone.utc) - timedelta(days=1)),
         "pdf_url": None
     }
     nfas.append(nfa5)
@@ -474,6 +475,12 @@ async def seed_database():
     await db.nfa_requests.insert_many(nfas)
     print(f"✅ Created {len(nfas)} NFAs")
     
+    # Align NFA number counters with the seeded numbers
+    from core.database import db_instance
+    from services.nfa_service import NFAService
+    db_instance.db = db
+    await NFAService.seed_nfa_counters()
+    
     # Create Approval Workflows
     print("✅ Creating approval workflows...")
     approvals = []
@@ -491,8 +498,8 @@ async def seed_database():
             "status": "approved",
             "action": "approve",
             "comments": "Approved. Good investment for our financial operations.",
-            "action_timestamp": (datetime.now(timezone.utc) - timedelta(days=12)).isoformat(),
-            "created_at": (datetime.now(timezone.utc) - timedelta(days=15)).isoformat()
+            "action_timestamp": (datetime.now(timezone.utc) - timedelta(days=12)),
+            "created_at": (datetime.now(timezone.utc) - timedelta(days=15))
         },
         {
             "id": generate_id(),
@@ -505,8 +512,8 @@ async def seed_database():
             "status": "approved",
             "action": "approve",
             "comments": "Financially sound. Approved.",
-            "action_timestamp": (datetime.now(timezone.utc) - timedelta(days=10)).isoformat(),
-            "created_at": (datetime.now(timezone.utc) - timedelta(days=15)).isoformat()
+            "action_timestamp": (datetime.now(timezone.utc) - timedelta(days=10)),
+            "created_at": (datetime.now(timezone.utc) - timedelta(days=15))
         },
         {
             "id": generate_id(),
@@ -519,8 +526,8 @@ async def seed_database():
             "status": "approved",
             "action": "approve",
             "comments": "Vendor selection is appropriate.",
-            "action_timestamp": (datetime.now(timezone.utc) - timedelta(days=7)).isoformat(),
-            "created_at": (datetime.now(timezone.utc) - timedelta(days=10)).isoformat()
+            "action_timestamp": (datetime.now(timezone.utc) - timedelta(days=7)),
+            "created_at": (datetime.now(timezone.utc) - timedelta(days=10))
         },
         {
             "id": generate_id(),
@@ -533,8 +540,8 @@ async def seed_database():
             "status": "approved",
             "action": "approve",
             "comments": "Final approval granted.",
-            "action_timestamp": (datetime.now(timezone.utc) - timedelta(days=5)).isoformat(),
-            "created_at": (datetime.now(timezone.utc) - timedelta(days=10)).isoformat()
+            "action_timestamp": (datetime.now(timezone.utc) - timedelta(days=5)),
+            "created_at": (datetime.now(timezone.utc) - timedelta(days=10))
         }
     ])
     
@@ -552,7 +559,7 @@ async def seed_database():
             "action": None,
             "comments": None,
             "action_timestamp": None,
-            "created_at": (datetime.now(timezone.utc) - timedelta(days=3)).isoformat()
+            "created_at": (datetime.now(timezone.utc) - timedelta(days=3))
         },
         {
             "id": generate_id(),
@@ -566,7 +573,7 @@ async def seed_database():
             "action": None,
             "comments": None,
             "action_timestamp": None,
-            "created_at": (datetime.now(timezone.utc) - timedelta(days=3)).isoformat()
+            "created_at": (datetime.now(timezone.utc) - timedelta(days=3))
         }
     ])
     
@@ -583,8 +590,8 @@ async def seed_database():
             "status": "approved",
             "action": "approve",
             "comments": "Maintenance is necessary. Approved.",
-            "action_timestamp": (datetime.now(timezone.utc) - timedelta(days=5)).isoformat(),
-            "created_at": (datetime.now(timezone.utc) - timedelta(days=7)).isoformat()
+            "action_timestamp": (datetime.now(timezone.utc) - timedelta(days=5)),
+            "created_at": (datetime.now(timezone.utc) - timedelta(days=7))
         },
         {
             "id": generate_id(),
@@ -597,8 +604,8 @@ async def seed_database():
             "status": "approved",
             "action": "approve",
             "comments": "Approved for maintenance work.",
-            "action_timestamp": (datetime.now(timezone.utc) - timedelta(days=3)).isoformat(),
-            "created_at": (datetime.now(timezone.utc) - timedelta(days=7)).isoformat()
+            "action_timestamp": (datetime.now(timezone.utc) - timedelta(days=3)),
+            "created_at": (datetime.now(timezone.utc) - timedelta(days=7))
         }
     ])
     
@@ -615,8 +622,8 @@ async def seed_database():
             "status": "approved",
             "action": "approve",
             "comments": "Approved for furniture purchase.",
-            "action_timestamp": (datetime.now(timezone.utc) - timedelta(days=8)).isoformat(),
-            "created_at": (datetime.now(timezone.utc) - timedelta(days=10)).isoformat()
+            "action_timestamp": (datetime.now(timezone.utc) - timedelta(days=8)),
+            "created_at": (datetime.now(timezone.utc) - timedelta(days=10))
         },
         {
             "id": generate_id(),
@@ -629,14 +636,21 @@ async def seed_database():
             "status": "approved",
             "action": "approve",
             "comments": "Final approval granted for furniture.",
-            "action_timestamp": (datetime.now(timezone.utc) - timedelta(days=1)).isoformat(),
-            "created_at": (datetime.now(timezone.utc) - timedelta(days=8)).isoformat()
+            "action_timestamp": (datetime.now(timezone.utc) - timedelta(days=1)),
+            "created_at": (datetime.now(timezone.utc) - timedelta(days=8))
         }
     ])
     
     await db.approval_workflows.insert_many(approvals)
     print(f"✅ Created {len(approvals)} approval workflows")
     
+    # Recount dashboard counters, analytics rollups and approval durations for the seeded data
+    from services.user_stats_service import UserStatsService
+    await UserStatsService.rebuild_user_stats()
+    from services.rollup_service import RollupService
+    await RollupService.rebuild_rollups()
+    await NFAService.backfill_approval_durations()
+    
     # Summary
     print("\n" + "="*60)
     print("✅ DATABASE SEEDING COMPLETED SUCCESSFULLY!")
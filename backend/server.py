@@ -10,6 +10,7 @@ from pathlib import Path
 from api.routes import auth, users, nfa, approvals, vendors, reports, admin, websocket, notifications
 from core.database import init_db, close_db
 from core.config import settings
+from core.pagination import NEXT_CURSOR_HEADER
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -45,6 +46,7 @@ app.add_middleware(
     allow_origins=settings.CORS_ORIGINS.split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include routers
@@ -0,0 +1,81 @@
+from typing import Dict, Any
+from datetime import datetime, timezone
+from core.config import settings
+from core.database import get_database
+from core.cache import ReportCache
+from models.schemas import ApprovalStatus, NFAStatus
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+EXACT = "exact"
+ESTIMATED = "estimated"
+
+admin_stats_cache = ReportCache(1, settings.ADMIN_STATS_TTL_SECONDS, settings.REPORT_CACHE_STALE_SECONDS)
+
+class AdminStatsService:
+    @staticmethod
+    async def get_admin_stats() -> Dict[str, Any]:
+        """Admin statistics, fresh for ADMIN_STATS_TTL_SECONDS and then refreshed in the background"""
+        return await admin_stats_cache.get_or_compute("admin_stats", AdminStatsService.compute_admin_stats)
+
+    @staticmethod
+    async def compute_admin_stats() -> Dict[str, Any]:
+        """Assemble admin statistics
+
+        Unfiltered totals use collection metadata (estimated_document_count);
+        filtered counts are exact and run concurrently.
+        """
+        db = await get_database()
+
+        (
+            total_users,
+            total_nfas,
+            total_vendors,
+            total_approvals,
+            pending_approvals,
+            pending_nfas,
+            recent_nfas
+        ) = await asyncio.gather(
+            db.users.estimated_document_count(),
+            db.nfa_requests.estimated_document_count(),
+            db.vendors.estimated_document_count(),
+            db.approval_workflows.estimated_document_count(),
+            db.approval_workflows.count_documents({"status": ApprovalStatus.PENDING.value}),
+            db.nfa_requests.count_documents({
+                "status": {"$in": [NFAStatus.SECTION1_PENDING.value, NFAStatus.SECTION2_PENDING.value]}
+            }),
+            db.nfa_requests.find(
+                {},
+                {"_id": 0, "id": 1, "nfa_number": 1, "status": 1, "requestor_name": 1, "created_at": 1}
+            ).sort("created_at", -1).limit(10).to_list(10)
+        )
+
+        stats = {
+            "totals": {
+                "users": total_users,
+                "nfas": total_nfas,
+                "vendors": total_vendors,
+                "approvals": total_approvals
+            },
+            "pending": {
+                "approvals": pending_approvals,
+                "nfas": pending_nfas
+            },
+            "recent_nfas": recent_nfas,
+            "accuracy": {
+                "totals": {
+                    "users": ESTIMATED,
+                    "nfas": ESTIMATED,
+                    "vendors": ESTIMATED,
+                    "approvals": ESTIMATED
+                },
+                "pending": {
+                    "approvals": EXACT,
+                    "nfas": EXACT
+                }
+            },
+            "generated_at": datetime.now(timezone.utc)
+        }
+        return stats
@@ -1,12 +1,35 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone
+from core.config import settings
 from core.database import get_database
+from core.cache import TTLCache
+from core.joins import attach_related
+from services.user_stats_service import UserStatsService
+from services.rollup_service import RollupService
 from models.schemas import ApprovalStatus, ApprovalAction, NFAStatus
+from pymongo import ReturnDocument
 import logging
 import uuid
 
 logger = logging.getLogger(__name__)
 
+# Short-lived memo of per-approver statistics; invalidated when their workflows change
+approver_stats_cache = TTLCache(1000, settings.APPROVER_STATS_TTL_SECONDS)
+
+# NFA fields shown alongside each pending approval
+PENDING_NFA_PROJECTION = {
+    "id": 1,
+    "nfa_number": 1,
+    "requestor_name": 1,
+    "status": 1,
+    "created_at": 1,
+    "section1_data.subject_item": 1,
+    "section1_data.background_purpose": 1,
+    "section1_data.department": 1,
+    "section1_data.amount_of_approval": 1,
+    "section1_data.currency": 1
+}
+
 class ApprovalService:
     @staticmethod
     async def create_approval_workflows(
@@ -31,12 +54,16 @@ class ApprovalService:
                 "action": None,
                 "comments": None,
                 "action_timestamp": None,
-                "created_at": datetime.now(timezone.utc).isoformat()
+                "created_at": datetime.now(timezone.utc)
             }
             workflows.append(workflow_doc)
         
         if workflows:
             await db.approval_workflows.insert_many(workflows)
+            await UserStatsService.record_workflows_created(workflows)
+            await RollupService.record_workflows_created(workflows)
+            for workflow in workflows:
+                approver_stats_cache.delete(workflow["approver_id"])
             logger.info(f"Created {len(workflows)} approval workflows for NFA: {nfa_id}, Section: {section}")
         
         return workflows
@@ -51,38 +78,46 @@ class ApprovalService:
         """Process approval action"""
         db = await get_database()
         
-        # Get workflow
-        workflow = await db.approval_workflows.find_one({"id": workflow_id})
-        if not workflow:
-            raise ValueError("Approval workflow not found")
-        
-        # Verify approver
-        if workflow["approver_id"] != approver_id:
-            raise ValueError("Unauthorized: You are not the designated approver")
-        
-        # Check if already processed
-        if workflow["status"] != ApprovalStatus.PENDING.value:
-            raise ValueError("This approval has already been processed")
-        
-        # Update workflow
         new_status = {
             ApprovalAction.APPROVE: ApprovalStatus.APPROVED,
             ApprovalAction.REJECT: ApprovalStatus.REJECTED,
             ApprovalAction.SEND_BACK: ApprovalStatus.SENT_BACK
         }[action]
         
-        await db.approval_workflows.update_one(
-            {"id": workflow_id},
+        # Update workflow only if it is still pending for this approver
+        workflow = await db.approval_workflows.find_one_and_update(
+            {
+                "id": workflow_id,
+                "approver_id": approver_id,
+                "status": ApprovalStatus.PENDING.value
+            },
             {
                 "$set": {
                     "status": new_status.value,
                     "action": action.value,
                     "comments": comments,
-                    "action_timestamp": datetime.now(timezone.utc).isoformat()
+                    "action_timestamp": datetime.now(timezone.utc)
                 }
-            }
+            },
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
         )
         
+        if not workflow:
+            # Work out which guard failed for the error message
+            existing = await db.approval_workflows.find_one(
+                {"id": workflow_id},
+                {"_id": 0, "approver_id": 1}
+            )
+            if not existing:
+                raise ValueError("Approval workflow not found")
+            if existing["approver_id"] != approver_id:
+                raise ValueError("Unauthorized: You are not the designated approver")
+            raise ValueError("This approval has already been processed")
+        
+        await UserStatsService.record_workflow_action(approver_id, new_status.value)
+        await RollupService.record_workflow_action(workflow)
+        approver_stats_cache.delete(approver_id)
         logger.info(f"Approval processed: {workflow_id}, Action: {action.value}")
         
         # Handle workflow progression
@@ -98,49 +133,77 @@ class ApprovalService:
             # Check if all approvals in section are complete
             await ApprovalService.check_section_completion(nfa_id, section)
         
-        # Get updated workflow
-        updated_workflow = await db.approval_workflows.find_one({"id": workflow_id}, {"_id": 0})
-        return updated_workflow
+        return workflow
     
     @staticmethod
-    async def check_section_completion(nfa_id: str, section: int):
-        """Check if all approvals in a section are complete"""
+    def remaining_approvals_field(section: int) -> str:
+        """NFA field holding the number of approvals still outstanding in a section"""
+        return f"section{section}_remaining_approvals"
+    
+    @staticmethod
+    async def check_section_completion(nfa_id: str, section: int) -> bool:
+        """Record one approval in a section and complete it when none remain
+        
+        The remaining-approvals counter on the NFA is decremented atomically, so
+        exactly one approver observes it reaching zero and triggers completion.
+        """
         db = await get_database()
+        field = ApprovalService.remaining_approvals_field(section)
+        # Submission and creation times, to time the section when it completes
+        timing_projection = {"_id": 0, f"section{section}_submitted_at": 1, "created_at": 1}
         
-        # Get all workflows for this section
-        workflows = await db.approval_workflows.find(
-            {"nfa_id": nfa_id, "section": section},
-            {"_id": 0}
-        ).sort("sequence", 1).to_list(100)
+        nfa = await db.nfa_requests.find_one_and_update(
+            {"id": nfa_id, field: {"$gt": 0}},
+            {"$inc": {field: -1}},
+            projection={**timing_projection, field: 1},
+            return_document=ReturnDocument.AFTER
+        )
         
-        # Check if all are approved
-        all_approved = all(w["status"] == ApprovalStatus.APPROVED.value for w in workflows)
+        if nfa:
+            all_approved = nfa[field] == 0
+        else:
+            # NFAs submitted before the counter existed fall back to a full check
+            nfa = await db.nfa_requests.find_one({"id": nfa_id, field: {"$exists": False}}, timing_projection)
+            if not nfa:
+                return False
+            workflows = await db.approval_workflows.find(
+                {"nfa_id": nfa_id, "section": section},
+                {"_id": 0, "status": 1}
+            ).to_list(100)
+            all_approved = all(w["status"] == ApprovalStatus.APPROVED.value for w in workflows)
         
-        if all_approved:
-            from services.nfa_service import NFAService
+        if not all_approved:
+            return False
+        
+        from services.nfa_service import NFAService
+        
+        completion = NFAService.section_completion_fields(nfa, section, datetime.now(timezone.utc))
+        
+        if section == 1:
+            # Section 1 complete - move to coordinator stage
+            nfa = await NFAService.update_nfa_status(
+                nfa_id,
+                NFAStatus.SECTION1_APPROVED,
+                "coordinator_processing",
+                completion
+            )
+            logger.info(f"Section 1 approvals complete for NFA: {nfa_id}")
             
-            if section == 1:
-                # Section 1 complete - move to coordinator stage
-                await NFAService.update_nfa_status(
-                    nfa_id,
-                    NFAStatus.SECTION1_APPROVED,
-                    "coordinator_processing"
-                )
-                logger.info(f"Section 1 approvals complete for NFA: {nfa_id}")
-                
-                # Notify coordinator
-                from tasks.email_tasks import send_coordinator_notification
-                nfa = await NFAService.get_nfa_by_id(nfa_id)
-                if nfa and nfa.get("section1_data", {}).get("ibm_coordinator"):
-                    send_coordinator_notification.delay(nfa_id, nfa["section1_data"]["ibm_coordinator"])
+            # Notify coordinator
+            from tasks.email_tasks import send_coordinator_notification
+            if nfa and nfa.get("section1_data", {}).get("ibm_coordinator"):
+                send_coordinator_notification.delay(nfa_id, nfa["section1_data"]["ibm_coordinator"])
+        
+        elif section == 2:
+            # Section 2 complete - finalize NFA
+            await db.nfa_requests.update_one({"id": nfa_id}, {"$set": completion})
+            logger.info(f"Section 2 approvals complete for NFA: {nfa_id}")
             
-            elif section == 2:
-                # Section 2 complete - finalize NFA
-                logger.info(f"Section 2 approvals complete for NFA: {nfa_id}")
-                
-                # Generate PDF and finalize
-                from tasks.pdf_tasks import generate_nfa_pdf
-                generate_nfa_pdf.delay(nfa_id)
+            # Generate PDF and finalize
+            from tasks.pdf_tasks import generate_nfa_pdf
+            generate_nfa_pdf.delay(nfa_id)
+        
+        return True
     
     @staticmethod
     async def get_pending_approvals(approver_id: str) -> List[Dict[str, Any]]:
@@ -155,11 +218,8 @@ class ApprovalService:
             {"_id": 0}
         ).sort("created_at", -1).to_list(100)
         
-        # Enrich with NFA data
-        for workflow in workflows:
-            nfa = await db.nfa_requests.find_one({"id": workflow["nfa_id"]}, {"_id": 0})
-            if nfa:
-                workflow["nfa"] = nfa
+        # Enrich with NFA data in one batched query
+        await attach_related(workflows, "nfa_id", db.nfa_requests, "nfa", PENDING_NFA_PROJECTION)
         
         return workflows
     
@@ -178,25 +238,27 @@ class ApprovalService:
     @staticmethod
     async def get_approver_statistics(approver_id: str) -> Dict[str, Any]:
         """Get approval statistics for an approver"""
+        cached = approver_stats_cache.get(approver_id)
+        if cached is not None:
+            return dict(cached)
+        
         db = await get_database()
         
-        total = await db.approval_workflows.count_documents({"approver_id": approver_id})
-        pending = await db.approval_workflows.count_documents({
-            "approver_id": approver_id,
-            "status": ApprovalStatus.PENDING.value
-        })
-        approved = await db.approval_workflows.count_documents({
-            "approver_id": approver_id,
-            "status": ApprovalStatus.APPROVED.value
-        })
-        rejected = await db.approval_workflows.count_documents({
-            "approver_id": approver_id,
-            "status": ApprovalStatus.REJECTED.value
-        })
-        
-        return {
-            "total": total,
-            "pending": pending,
-            "approved": approved,
-            "rejected": rejected
+        # One pass over the (approver_id, status, ...) index, covered by the projection
+        pipeline = [
+            {"$match": {"approver_id": approver_id}},
+            {"$project": {"_id": 0, "status": 1}},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ]
+        counts = {row["_id"]: row["count"] async for row in db.approval_workflows.aggregate(pipeline)}
+        
+        stats = {
+            "total": sum(counts.values()),
+            "pending": counts.get(ApprovalStatus.PENDING.value, 0),
+            "approved": counts.get(ApprovalStatus.APPROVED.value, 0),
+            "rejected": counts.get(ApprovalStatus.REJECTED.value, 0)
         }
+        
+        if settings.APPROVER_STATS_TTL_SECONDS > 0:
+            approver_stats_cache.set(approver_id, dict(stats))
+        return stats
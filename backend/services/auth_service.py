@@ -1,14 +1,30 @@
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
 from core.database import get_database
-from core.security import SecurityService
+from core.cache import TTLCache
+from core.joins import fetch_by_ids
+from core.security import SecurityService, token_cache
 from core.config import settings
 from models.schemas import UserCreate, UserRole, UserResponse
 import logging
+import time
 import uuid
 
 logger = logging.getLogger(__name__)
 
+USER_PUBLIC_PROJECTION = {"_id": 0, "password_hash": 0}
+
+# Users change rarely, so directory lookups are served from a process-local cache.
+# Writes through the API invalidate it; other processes converge within the TTL.
+user_cache = TTLCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+def copy_user(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a user document going into or out of the cache, roles list included"""
+    copied = dict(user)
+    if "roles" in copied:
+        copied["roles"] = list(copied["roles"])
+    return copied
+
 class AuthService:
     @staticmethod
     async def create_user(user_data: UserCreate) -> Dict[str, Any]:
@@ -26,7 +42,7 @@ class AuthService:
             raise ValueError("Email already exists")
         
         # Hash password
-        hashed_password = SecurityService.hash_password(user_data.password)
+        hashed_password = await SecurityService.hash_password_async(user_data.password)
         
         # Create user document
         user_doc = {
@@ -40,9 +56,10 @@ class AuthService:
             "location": user_data.location,
             "function": user_data.function,
             "roles": [role.value for role in user_data.roles],
+            "approval_digest": user_data.approval_digest,
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         }
         
         await db.users.insert_one(user_doc)
@@ -51,6 +68,8 @@ class AuthService:
         # Remove password hash from response
         user_doc.pop("password_hash", None)
         user_doc.pop("_id", None)
+        
+        user_cache.set(user_doc["id"], copy_user(user_doc))
         return user_doc
     
     @staticmethod
@@ -62,12 +81,18 @@ class AuthService:
         if not user:
             return None
         
-        if not SecurityService.verify_password(password, user["password_hash"]):
+        verified, new_hash = await SecurityService.verify_and_update_async(password, user["password_hash"])
+        if not verified:
             return None
         
         if not user.get("is_active", True):
             return None
         
+        # Transparently upgrade hashes created with a different cost factor
+        if new_hash:
+            await db.users.update_one({"id": user["id"]}, {"$set": {"password_hash": new_hash}})
+            logger.info(f"Password hash upgraded for: {username}")
+        
         # Remove sensitive data
         user.pop("password_hash", None)
         user.pop("_id", None)
@@ -76,10 +101,50 @@ class AuthService:
     @staticmethod
     async def get_user_by_id(user_id: str) -> Optional[Dict[str, Any]]:
         """Get user by ID"""
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            return copy_user(cached)
+        
         db = await get_database()
-        user = await db.users.find_one({"id": user_id}, {"_id": 0, "password_hash": 0})
+        user = await db.users.find_one({"id": user_id}, USER_PUBLIC_PROJECTION)
+        if user:
+            user_cache.set(user_id, copy_user(user))
         return user
     
+    @staticmethod
+    async def get_users_by_ids(user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get many users by ID, keyed by ID, with one query for the cache misses"""
+        users = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            cached = user_cache.get(user_id)
+            if cached is not None:
+                users[user_id] = copy_user(cached)
+            else:
+                missing.append(user_id)
+        
+        if missing:
+            db = await get_database()
+            fetched = await fetch_by_ids(db.users, missing, {"password_hash": 0})
+            for user_id, user in fetched.items():
+                user_cache.set(user_id, copy_user(user))
+                users[user_id] = user
+        
+        return users
+    
+    @staticmethod
+    def invalidate_cached_user(user_id: str):
+        """Drop a user from the directory cache after it has been written"""
+        user_cache.delete(user_id)
+    
+    @staticmethod
+    async def revoke_tokens(user_id: str):
+        """Reject every token issued to a user so far, in all API workers"""
+        db = await get_database()
+        await db.users.update_one({"id": user_id}, {"$set": {"tokens_valid_after": int(time.time())}})
+        user_cache.delete(user_id)
+        token_cache.invalidate_user(user_id)
+    
     @staticmethod
     async def create_superadmin():
         """Create superadmin user if not exists"""
@@ -90,7 +155,7 @@ class AuthService:
             logger.info("SuperAdmin already exists")
             return
         
-        hashed_password = SecurityService.hash_password(settings.SUPERADMIN_PASSWORD)
+        hashed_password = await SecurityService.hash_password_async(settings.SUPERADMIN_PASSWORD)
         
         superadmin_doc = {
             "id": str(uuid.uuid4()),
@@ -104,8 +169,8 @@ class AuthService:
             "function": "Administration",
             "roles": [UserRole.SUPERADMIN.value],
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         }
         
         await db.users.insert_one(superadmin_doc)
@@ -0,0 +1,79 @@
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta, timezone
+from core.config import settings
+from core.database import get_database
+from pymongo import UpdateOne
+import logging
+
+logger = logging.getLogger(__name__)
+
+class DigestService:
+    """Buffers approval notifications per approver into one digest email
+
+    Each approver with an open digest has one `notification_digests` document
+    (keyed by user id) collecting pending NFAs. The notification that opens it
+    schedules a flush APPROVAL_DIGEST_WINDOW_SECONDS later; the flush takes the
+    document atomically, so anything arriving afterwards opens a new digest.
+    """
+
+    @staticmethod
+    def is_urgent(nfa_details: Dict[str, Any]) -> bool:
+        return (nfa_details.get("amount") or 0) >= settings.APPROVAL_DIGEST_URGENT_AMOUNT
+
+    @staticmethod
+    def wants_digest(approver: Dict[str, Any], nfa_details: Dict[str, Any]) -> bool:
+        """Digest mode is opt-in per user, and urgent (high-amount) NFAs always go out at once"""
+        return (
+            settings.APPROVAL_DIGEST_ENABLED
+            and approver.get("approval_digest", False)
+            and not DigestService.is_urgent(nfa_details)
+        )
+
+    @staticmethod
+    async def enqueue_many(approvers: List[Dict[str, Any]], nfa_id: str, nfa_details: Dict[str, Any]) -> List[str]:
+        """Add an NFA to each approver's open digest in one bulk write
+
+        Returns the ids of approvers whose digest needs a flush scheduled: those
+        this write opened, plus any left open well past their window.
+        """
+        if not approvers:
+            return []
+
+        db = await get_database()
+        now = datetime.now(timezone.utc)
+
+        result = await db.notification_digests.bulk_write([
+            UpdateOne(
+                {"_id": approver["id"]},
+                {
+                    "$push": {"items": {"nfa_id": nfa_id, "details": nfa_details, "queued_at": now}},
+                    "$set": {"email": approver["email"], "name": approver["name"]},
+                    "$setOnInsert": {"opened_at": now}
+                },
+                upsert=True
+            )
+            for approver in approvers
+        ], ordered=False)
+
+        opened = [approvers[index]["id"] for index in result.upserted_ids]
+        existing = [approver["id"] for approver in approvers if approver["id"] not in opened]
+        if not existing:
+            return opened
+
+        # A digest open well past its window lost its flush task; schedule another
+        overdue_before = now - timedelta(seconds=2 * settings.APPROVAL_DIGEST_WINDOW_SECONDS)
+        overdue = [
+            doc["_id"] async for doc in db.notification_digests.find(
+                {"_id": {"$in": existing}, "opened_at": {"$lt": overdue_before}},
+                {"_id": 1}
+            )
+        ]
+        for approver_id in overdue:
+            logger.warning(f"Approval digest for {approver_id} overdue; rescheduling flush")
+        return opened + overdue
+
+    @staticmethod
+    async def take(approver_id: str) -> Optional[Dict[str, Any]]:
+        """Remove and return an approver's open digest"""
+        db = await get_database()
+        return await db.notification_digests.find_one_and_delete({"_id": approver_id})
@@ -0,0 +1,205 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+from datetime import datetime
+from core.config import settings
+from core.database import get_database
+from core.timestamps import format_date
+from models.schemas import Section1Data, Section2Data
+from services.nfa_service import NFA_LIST_SORT
+import aiofiles
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import tempfile
+import xlsxwriter
+
+logger = logging.getLogger(__name__)
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+}
+
+NFA_EXPORT_FIELDS = [
+    "id", "nfa_number", "status", "current_stage", "requestor_id", "requestor_name",
+    "created_at", "updated_at", "section1_completed_at", "section2_completed_at",
+    "finalized_at", "total_duration_seconds", "pdf_url"
+]
+
+# Section data is flattened to prefixed columns; approver lists are covered by approval history
+SECTION_EXPORT_FIELDS = {
+    "section1_data": [f for f in Section1Data.model_fields if f != "approver_list"],
+    "section2_data": [f for f in Section2Data.model_fields if f != "approver_list"]
+}
+
+APPROVAL_EXPORT_PROJECTION = {
+    "_id": 0,
+    "nfa_id": 1,
+    "section": 1,
+    "sequence": 1,
+    "approver_name": 1,
+    "status": 1,
+    "comments": 1,
+    "action_timestamp": 1
+}
+
+EXPORT_COLUMNS = NFA_EXPORT_FIELDS + [
+    f"{section}.{field}" for section, fields in SECTION_EXPORT_FIELDS.items() for field in fields
+] + ["approval_history"]
+
+CHUNK_SIZE = 64 * 1024
+
+# An XLSX worksheet holds 1,048,576 rows, one of which is the header
+XLSX_MAX_ROWS = 1048576 - 1
+
+def flatten_nfa(nfa: Dict[str, Any]) -> Dict[str, Any]:
+    """One export row for an NFA, with section data as prefixed columns"""
+    row = {field: nfa.get(field) for field in NFA_EXPORT_FIELDS}
+    for section, fields in SECTION_EXPORT_FIELDS.items():
+        data = nfa.get(section) or {}
+        for field in fields:
+            row[f"{section}.{field}"] = data.get(field)
+    return row
+
+def summarize_approvals(approvals: List[Dict[str, Any]]) -> str:
+    """Approval history as a single cell, e.g. 'S1#1 Jane Doe: approved 2024-05-01'"""
+    return "; ".join(
+        f"S{a['section']}#{a['sequence']} {a['approver_name']}: {a['status']} "
+        f"{format_date(a.get('action_timestamp'), '')}".rstrip()
+        for a in approvals
+    )
+
+def cell_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def json_default(value: Any) -> str:
+    """json.dumps fallback: ISO dates, and the string form of anything else unserializable"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+class ExportService:
+    """Constant-memory NFA register exports
+
+    NFAs are read through a cursor in REPORT_BATCH_SIZE batches, each batch
+    joined to its approval history with one $in query, and written out as it
+    arrives so memory does not grow with the result size.
+    """
+
+    @staticmethod
+    async def iter_nfa_batches(
+        filters: Optional[Dict[str, Any]] = None,
+        batch_size: int = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield flattened NFA rows in batches, with `approvals` attached to each row"""
+        db = await get_database()
+        batch_size = batch_size or settings.REPORT_BATCH_SIZE
+
+        cursor = db.nfa_requests.find(filters or {}, {"_id": 0}).sort(NFA_LIST_SORT).batch_size(batch_size)
+
+        while nfas := await cursor.to_list(batch_size):
+            approvals: Dict[str, List[Dict[str, Any]]] = {}
+            async for approval in db.approval_workflows.find(
+                {"nfa_id": {"$in": [nfa["id"] for nfa in nfas]}},
+                APPROVAL_EXPORT_PROJECTION
+            ).sort([("nfa_id", 1), ("section", 1), ("sequence", 1)]):
+                approvals.setdefault(approval["nfa_id"], []).append(approval)
+
+            yield [
+                {**flatten_nfa(nfa), "approvals": approvals.get(nfa["id"], [])}
+                for nfa in nfas
+            ]
+
+    @staticmethod
+    async def check_size(export_format: str, filters: Optional[Dict[str, Any]] = None):
+        """Reject exports the format cannot hold before any of the response is sent"""
+        if export_format != "xlsx":
+            return
+        db = await get_database()
+        count = await db.nfa_requests.count_documents(filters or {})
+        if count > XLSX_MAX_ROWS:
+            raise ValueError(
+                f"{count:,} NFAs match, but an XLSX export holds at most {XLSX_MAX_ROWS:,}; "
+                "narrow the filter or export as CSV or NDJSON"
+            )
+
+    @staticmethod
+    async def stream_csv(filters: Optional[Dict[str, Any]] = None) -> AsyncIterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+
+        async for rows in ExportService.iter_nfa_batches(filters):
+            for row in rows:
+                row["approval_history"] = summarize_approvals(row.pop("approvals"))
+                writer.writerow([cell_value(row[column]) for column in EXPORT_COLUMNS])
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+        # Header only when nothing matched
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    async def stream_ndjson(filters: Optional[Dict[str, Any]] = None) -> AsyncIterator[bytes]:
+        async for rows in ExportService.iter_nfa_batches(filters):
+            lines = []
+            for row in rows:
+                row["approval_history"] = row.pop("approvals")
+                lines.append(json.dumps(row, default=json_default))
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+    @staticmethod
+    async def stream_xlsx(filters: Optional[Dict[str, Any]] = None) -> AsyncIterator[bytes]:
+        """Write the workbook to a temporary file in constant-memory mode, then stream it
+
+        XLSX is a zip archive, so nothing can be sent until the workbook is closed.
+        """
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        try:
+            workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "remove_timezone": True})
+            sheet = workbook.add_worksheet("NFAs")
+            date_format = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm"})
+            sheet.write_row(0, 0, EXPORT_COLUMNS)
+
+            def write_rows(rows: List[Dict[str, Any]], first_row: int):
+                for offset, row in enumerate(rows):
+                    row["approval_history"] = summarize_approvals(row.pop("approvals"))
+                    for col, column in enumerate(EXPORT_COLUMNS):
+                        value = row[column]
+                        if isinstance(value, datetime):
+                            sheet.write_datetime(first_row + offset, col, value, date_format)
+                        elif value is not None:
+                            sheet.write(first_row + offset, col, value)
+
+            next_row = 1
+            async for rows in ExportService.iter_nfa_batches(filters):
+                # NFAs created since check_size() can still push past the sheet; fail rather than truncate
+                if next_row + len(rows) > XLSX_MAX_ROWS + 1:
+                    raise ValueError(f"XLSX export exceeds {XLSX_MAX_ROWS:,} rows")
+                # xlsxwriter flushes each finished row to disk; keep that I/O off the loop
+                await asyncio.to_thread(write_rows, rows, next_row)
+                next_row += len(rows)
+            await asyncio.to_thread(workbook.close)
+
+            async with aiofiles.open(path, "rb") as f:
+                while chunk := await f.read(CHUNK_SIZE):
+                    yield chunk
+        finally:
+            os.remove(path)
+
+    @staticmethod
+    def stream(export_format: str, filters: Optional[Dict[str, Any]] = None) -> AsyncIterator[bytes]:
+        streams = {
+            "csv": ExportService.stream_csv,
+            "ndjson": ExportService.stream_ndjson,
+            "xlsx": ExportService.stream_xlsx
+        }
+        return streams[export_format](filters)
@@ -1,6 +1,11 @@
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from core.database import get_database
+from core.pagination import apply_keyset
+from core.timestamps import to_datetime, seconds_between, date_expr
+from services.user_stats_service import UserStatsService
+from services.rollup_service import RollupService
+from pymongo import ReturnDocument, UpdateOne
 from models.schemas import (
     NFACreate, NFAUpdate, NFAStatus, Section1Data, Section2Data,
     ApprovalStatus, ApprovalAction
@@ -10,6 +15,15 @@ import uuid
 
 logger = logging.getLogger(__name__)
 
+# Keyset sort order for NFA listings, backed by the (created_at, id) compound indexes
+NFA_LIST_SORT = [("created_at", -1), ("id", -1)]
+
+# Per-year NFA number sequences live in the counters collection as "nfa_number:<year>"
+NFA_COUNTER_PREFIX = "nfa_number:"
+
+# How long a finalize claim holds an NFA before another attempt may take it over
+FINALIZE_LEASE_SECONDS = 300
+
 class NFAService:
     @staticmethod
     async def create_nfa(nfa_data: NFACreate, requestor_id: str, requestor_name: str) -> Dict[str, Any]:
@@ -25,12 +39,14 @@ class NFAService:
             "current_stage": "draft",
             "section1_data": nfa_data.section1_data.model_dump() if nfa_data.section1_data else {},
             "section2_data": {},
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc),
             "pdf_url": None
         }
         
         await db.nfa_requests.insert_one(nfa_doc)
+        await UserStatsService.record_nfa_created(nfa_doc)
+        await RollupService.record_nfa_change(None, nfa_doc)
         logger.info(f"NFA created: {nfa_doc['id']} by {requestor_name}")
         
         nfa_doc.pop("_id", None)
@@ -40,25 +56,35 @@ class NFAService:
     async def submit_section1(nfa_id: str, approvers: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Submit Section 1 for approval"""
         db = await get_database()
+        now = datetime.now(timezone.utc)
         
-        # Update NFA status
-        await db.nfa_requests.update_one(
-            {"id": nfa_id},
+        # Update NFA status, only if it is still a draft
+        nfa = await db.nfa_requests.find_one_and_update(
+            {"id": nfa_id, "status": NFAStatus.DRAFT.value},
             {
                 "$set": {
                     "status": NFAStatus.SECTION1_PENDING.value,
                     "current_stage": "section1_approval",
-                    "updated_at": datetime.now(timezone.utc).isoformat()
+                    "section1_remaining_approvals": len(approvers),
+                    "section1_submitted_at": now,
+                    "updated_at": now
                 }
-            }
+            },
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
         )
+        if not nfa:
+            raise ValueError("NFA not found or already submitted")
+        
+        await UserStatsService.record_nfa_status_change(
+            nfa["requestor_id"], NFAStatus.DRAFT.value, NFAStatus.SECTION1_PENDING.value
+        )
+        await RollupService.record_nfa_change({**nfa, "status": NFAStatus.DRAFT.value}, nfa)
         
         # Create approval workflows
         from services.approval_service import ApprovalService
         await ApprovalService.create_approval_workflows(nfa_id, 1, approvers)
         
-        # Get updated NFA
-        nfa = await db.nfa_requests.find_one({"id": nfa_id}, {"_id": 0})
         logger.info(f"Section 1 submitted for NFA: {nfa_id}")
         
         return nfa
@@ -68,17 +94,23 @@ class NFAService:
         """Update Section 2 data"""
         db = await get_database()
         
-        await db.nfa_requests.update_one(
-            {"id": nfa_id},
-            {
-                "$set": {
-                    "section2_data": section2_data.model_dump(),
-                    "updated_at": datetime.now(timezone.utc).isoformat()
-                }
-            }
+        update_data = {
+            "section2_data": section2_data.model_dump(),
+            "updated_at": datetime.now(timezone.utc)
+        }
+        
+        # Read the previous document back so the vendor rollup can be moved
+        previous = await db.nfa_requests.find_one_and_update(
+            {"id": nfa_id, "status": NFAStatus.SECTION1_APPROVED.value},
+            {"$set": update_data},
+            projection={"_id": 0},
+            return_document=ReturnDocument.BEFORE
         )
+        if not previous:
+            raise ValueError("Section 1 not yet approved")
         
-        nfa = await db.nfa_requests.find_one({"id": nfa_id}, {"_id": 0})
+        nfa = {**previous, **update_data}
+        await RollupService.record_nfa_change(previous, nfa)
         logger.info(f"Section 2 updated for NFA: {nfa_id}")
         return nfa
     
@@ -86,23 +118,34 @@ class NFAService:
     async def submit_section2(nfa_id: str, approvers: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Submit Section 2 for approval"""
         db = await get_database()
+        now = datetime.now(timezone.utc)
         
-        await db.nfa_requests.update_one(
-            {"id": nfa_id},
+        nfa = await db.nfa_requests.find_one_and_update(
+            {"id": nfa_id, "status": NFAStatus.SECTION1_APPROVED.value},
             {
                 "$set": {
                     "status": NFAStatus.SECTION2_PENDING.value,
                     "current_stage": "section2_approval",
-                    "updated_at": datetime.now(timezone.utc).isoformat()
+                    "section2_remaining_approvals": len(approvers),
+                    "section2_submitted_at": now,
+                    "updated_at": now
                 }
-            }
+            },
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if not nfa:
+            raise ValueError("NFA not found or Section 2 already submitted")
+        
+        await UserStatsService.record_nfa_status_change(
+            nfa["requestor_id"], NFAStatus.SECTION1_APPROVED.value, NFAStatus.SECTION2_PENDING.value
         )
+        await RollupService.record_nfa_change({**nfa, "status": NFAStatus.SECTION1_APPROVED.value}, nfa)
         
         # Create Section 2 approval workflows
         from services.approval_service import ApprovalService
         await ApprovalService.create_approval_workflows(nfa_id, 2, approvers)
         
-        nfa = await db.nfa_requests.find_one({"id": nfa_id}, {"_id": 0})
         logger.info(f"Section 2 submitted for NFA: {nfa_id}")
         return nfa
     
@@ -114,97 +157,248 @@ class NFAService:
         return nfa
     
     @staticmethod
-    async def get_nfas_by_requestor(requestor_id: str, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    async def get_nfas_by_requestor(
+        requestor_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """Get NFAs by requestor"""
-        db = await get_database()
-        cursor = db.nfa_requests.find(
-            {"requestor_id": requestor_id},
-            {"_id": 0}
-        ).sort("created_at", -1).skip(skip).limit(limit)
-        
-        nfas = await cursor.to_list(length=limit)
-        return nfas
+        return await NFAService.get_all_nfas(skip, limit, {"requestor_id": requestor_id}, cursor)
     
     @staticmethod
-    async def get_all_nfas(skip: int = 0, limit: int = 100, filters: Dict = None) -> List[Dict[str, Any]]:
-        """Get all NFAs with optional filters"""
+    async def get_all_nfas(
+        skip: int = 0,
+        limit: int = 100,
+        filters: Dict = None,
+        cursor: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get all NFAs with optional filters
+        
+        When a cursor is given it takes precedence over skip and pages by (created_at, id).
+        """
         db = await get_database()
         
-        query = filters or {}
-        cursor = db.nfa_requests.find(query, {"_id": 0}).sort("created_at", -1).skip(skip).limit(limit)
+        query = apply_keyset(filters or {}, NFA_LIST_SORT, cursor)
+        find_cursor = db.nfa_requests.find(query, {"_id": 0}).sort(NFA_LIST_SORT)
+        if not cursor:
+            find_cursor = find_cursor.skip(skip)
         
-        nfas = await cursor.to_list(length=limit)
+        nfas = await find_cursor.limit(limit).to_list(length=limit)
         return nfas
     
     @staticmethod
-    async def update_nfa_status(nfa_id: str, status: NFAStatus, stage: str = None) -> Dict[str, Any]:
-        """Update NFA status"""
+    async def update_nfa_status(
+        nfa_id: str,
+        status: NFAStatus,
+        stage: str = None,
+        fields: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Update NFA status, setting any extra `fields` in the same write"""
         db = await get_database()
         
         update_data = {
             "status": status.value,
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "updated_at": datetime.now(timezone.utc)
         }
         
         if stage:
             update_data["current_stage"] = stage
+        if fields:
+            update_data.update(fields)
         
-        await db.nfa_requests.update_one(
+        # Read the previous status back so counters and rollups can be moved
+        previous = await db.nfa_requests.find_one_and_update(
             {"id": nfa_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection={"_id": 0},
+            return_document=ReturnDocument.BEFORE
         )
+        if not previous:
+            return None
         
-        nfa = await db.nfa_requests.find_one({"id": nfa_id}, {"_id": 0})
+        nfa = {**previous, **update_data}
+        await UserStatsService.record_nfa_status_change(previous["requestor_id"], previous["status"], status.value)
+        await RollupService.record_nfa_change(previous, nfa)
         return nfa
     
+    @staticmethod
+    def section_completion_fields(nfa: Dict[str, Any], section: int, completed_at: datetime) -> Dict[str, Any]:
+        """Completion stamp for a section and its duration since submission
+        
+        NFAs submitted before submission times were recorded are timed from creation.
+        """
+        started_at = nfa.get(f"section{section}_submitted_at") or nfa.get("created_at")
+        return {
+            f"section{section}_completed_at": completed_at,
+            f"section{section}_duration_seconds": seconds_between(started_at, completed_at)
+        }
+    
+    @staticmethod
+    async def backfill_approval_durations(batch_size: int = 500) -> int:
+        """Stamp completion times on NFAs that progressed before they were recorded
+        
+        Section timings are recovered from their approved workflows (first created,
+        last actioned); finalization falls back to the NFA's last update.
+        """
+        db = await get_database()
+        section1_done = [
+            NFAStatus.SECTION1_APPROVED.value,
+            NFAStatus.SECTION2_PENDING.value,
+            NFAStatus.SECTION2_APPROVED.value,
+            NFAStatus.APPROVED.value
+        ]
+        section2_done = [NFAStatus.SECTION2_APPROVED.value, NFAStatus.APPROVED.value]
+        
+        cursor = db.nfa_requests.find(
+            {"status": {"$in": section1_done}, "section1_completed_at": {"$exists": False}},
+            {"_id": 0, "id": 1, "status": 1, "created_at": 1, "updated_at": 1}
+        )
+        stamped = 0
+        
+        while batch := await cursor.to_list(batch_size):
+            timings = {}
+            async for row in db.approval_workflows.aggregate([
+                {
+                    "$match": {
+                        "nfa_id": {"$in": [nfa["id"] for nfa in batch]},
+                        "status": ApprovalStatus.APPROVED.value
+                    }
+                },
+                {
+                    "$group": {
+                        "_id": {"nfa_id": "$nfa_id", "section": "$section"},
+                        "submitted_at": {"$min": date_expr("created_at")},
+                        "completed_at": {"$max": date_expr("action_timestamp")}
+                    }
+                }
+            ]):
+                timings[(row["_id"]["nfa_id"], row["_id"]["section"])] = row
+            
+            ops = []
+            for nfa in batch:
+                update = {}
+                for section, done in ((1, section1_done), (2, section2_done)):
+                    timing = timings.get((nfa["id"], section))
+                    if nfa["status"] in done and timing and timing["completed_at"]:
+                        started = {f"section{section}_submitted_at": timing["submitted_at"]}
+                        update.update(started)
+                        update.update(NFAService.section_completion_fields(
+                            started, section, to_datetime(timing["completed_at"])
+                        ))
+                if nfa["status"] == NFAStatus.APPROVED.value:
+                    update["finalized_at"] = to_datetime(nfa["updated_at"])
+                    update["total_duration_seconds"] = seconds_between(nfa["created_at"], nfa["updated_at"])
+                if update:
+                    ops.append(UpdateOne({"id": nfa["id"]}, {"$set": update}))
+            
+            if ops:
+                await db.nfa_requests.bulk_write(ops, ordered=False)
+                stamped += len(ops)
+        
+        logger.info(f"Stamped approval durations on {stamped} NFA(s)")
+        return stamped
+    
     @staticmethod
     async def generate_nfa_number() -> str:
-        """Generate unique NFA number"""
+        """Generate unique NFA number from the per-year counter"""
         db = await get_database()
         
         # Get current year
         year = datetime.now(timezone.utc).year
         
-        # Find the highest NFA number for current year
+        counter = await db.counters.find_one_and_update(
+            {"_id": f"{NFA_COUNTER_PREFIX}{year}"},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        
+        nfa_number = f"NFA/{year}/{counter['seq']:04d}"
+        logger.info(f"Generated NFA number: {nfa_number}")
+        return nfa_number
+    
+    @staticmethod
+    async def seed_nfa_counters():
+        """Initialise each year's NFA counter from the highest existing nfa_number
+        
+        Uses $max so it is safe to re-run and never moves a counter backwards.
+        """
+        db = await get_database()
+        
         pipeline = [
-            {"$match": {"nfa_number": {"$regex": f"^NFA/{year}/"}}},
-            {"$project": {"number": {"$toInt": {"$arrayElemAt": [{"$split": ["$nfa_number", "/"]}, 2]}}}},
-            {"$sort": {"number": -1}},
-            {"$limit": 1}
+            {"$match": {"nfa_number": {"$regex": "^NFA/"}}},
+            {"$project": {"parts": {"$split": ["$nfa_number", "/"]}}},
+            {
+                "$group": {
+                    "_id": {"$arrayElemAt": ["$parts", 1]},
+                    "max_number": {"$max": {"$toInt": {"$arrayElemAt": ["$parts", 2]}}}
+                }
+            }
         ]
         
-        result = await db.nfa_requests.aggregate(pipeline).to_list(1)
+        results = await db.nfa_requests.aggregate(pipeline).to_list(None)
+        for result in results:
+            await db.counters.update_one(
+                {"_id": f"{NFA_COUNTER_PREFIX}{result['_id']}"},
+                {"$max": {"seq": result["max_number"]}},
+                upsert=True
+            )
         
-        if result:
-            next_number = result[0]["number"] + 1
-        else:
-            next_number = 1
-        
-        nfa_number = f"NFA/{year}/{next_number:04d}"
-        logger.info(f"Generated NFA number: {nfa_number}")
-        return nfa_number
+        logger.info(f"Seeded NFA counters for {len(results)} year(s)")
     
     @staticmethod
-    async def finalize_nfa(nfa_id: str, pdf_url: str) -> Dict[str, Any]:
-        """Finalize NFA with number and PDF"""
+    async def finalize_nfa(nfa_id: str, pdf_url: str) -> Optional[Dict[str, Any]]:
+        """Finalize NFA with number and PDF
+        
+        The NFA is claimed before its number is allocated, so a retried or
+        concurrent finalize cannot burn a number. A claim abandoned by a crashed
+        worker can be retaken after FINALIZE_LEASE_SECONDS.
+        """
         db = await get_database()
         
+        finalized_at = datetime.now(timezone.utc)
+        lease_expired = finalized_at - timedelta(seconds=FINALIZE_LEASE_SECONDS)
+        
+        previous = await db.nfa_requests.find_one_and_update(
+            {
+                "id": nfa_id,
+                "status": {"$ne": NFAStatus.APPROVED.value},
+                "$or": [{"finalizing_at": {"$exists": False}}, {"finalizing_at": {"$lt": lease_expired}}]
+            },
+            {"$set": {"finalizing_at": finalized_at}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.BEFORE
+        )
+        
+        if not previous:
+            logger.warning(f"NFA not finalized (missing, already approved or being finalized): {nfa_id}")
+            return None
+        
         nfa_number = await NFAService.generate_nfa_number()
         
+        update_data = {
+            "nfa_number": nfa_number,
+            "status": NFAStatus.APPROVED.value,
+            "current_stage": "completed",
+            "pdf_url": pdf_url,
+            "finalized_at": finalized_at,
+            # From the claimed document, so the duration costs no extra read
+            "total_duration_seconds": seconds_between(previous["created_at"], finalized_at),
+            "updated_at": finalized_at
+        }
+        
         await db.nfa_requests.update_one(
             {"id": nfa_id},
-            {
-                "$set": {
-                    "nfa_number": nfa_number,
-                    "status": NFAStatus.APPROVED.value,
-                    "current_stage": "completed",
-                    "pdf_url": pdf_url,
-                    "updated_at": datetime.now(timezone.utc).isoformat()
-                }
-            }
+            {"$set": update_data, "$unset": {"finalizing_at": ""}}
         )
         
-        nfa = await db.nfa_requests.find_one({"id": nfa_id}, {"_id": 0})
+        previous.pop("finalizing_at", None)
+        nfa = {**previous, **update_data}
+        await UserStatsService.record_nfa_status_change(
+            previous["requestor_id"], previous["status"], NFAStatus.APPROVED.value
+        )
+        await RollupService.record_nfa_change(previous, nfa)
         logger.info(f"NFA finalized: {nfa_number}")
         return nfa
     
@@ -214,13 +408,34 @@ class NFAService:
         db = await get_database()
         
         # Delete NFA
-        result = await db.nfa_requests.delete_one({"id": nfa_id})
+        nfa = await db.nfa_requests.find_one_and_delete(
+            {"id": nfa_id},
+            projection={
+                "_id": 0,
+                "requestor_id": 1,
+                "status": 1,
+                "created_at": 1,
+                "section1_data.department": 1,
+                "section1_data.currency": 1,
+                "section1_data.amount_of_approval": 1,
+                "section2_data.vendor_id": 1
+            }
+        )
         
         # Delete associated approvals
+        workflows = await db.approval_workflows.find(
+            {"nfa_id": nfa_id},
+            {"_id": 0, "approver_id": 1, "status": 1, "created_at": 1}
+        ).to_list(None)
         await db.approval_workflows.delete_many({"nfa_id": nfa_id})
         
+        if nfa:
+            await UserStatsService.record_nfa_deleted(nfa, workflows)
+            await RollupService.record_nfa_change(nfa, None)
+        await RollupService.record_workflows_deleted(workflows)
+        
         # Delete attachments
         await db.attachments.delete_many({"nfa_id": nfa_id})
         
         logger.info(f"NFA deleted: {nfa_id}")
-        return result.deleted_count > 0
+        return nfa is not None
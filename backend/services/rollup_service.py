@@ -0,0 +1,204 @@
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
+from core.database import INDEX_SPECS, get_database, reconcile_indexes
+from core.timestamps import to_datetime, date_expr
+from models.schemas import ApprovalStatus
+from pymongo import UpdateOne
+import logging
+
+logger = logging.getLogger(__name__)
+
+def day_bucket(value: Any) -> datetime:
+    """Midnight UTC of the day a timestamp falls on"""
+    return to_datetime(value).replace(hour=0, minute=0, second=0, microsecond=0)
+
+def nfa_bucket(nfa: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+    """Rollup key and amount an NFA contributes, bucketed by its creation day"""
+    s1 = nfa.get("section1_data") or {}
+    s2 = nfa.get("section2_data") or {}
+    key = {
+        "day": day_bucket(nfa["created_at"]),
+        "status": nfa["status"],
+        "department": s1.get("department"),
+        "vendor_id": s2.get("vendor_id"),
+        "currency": s1.get("currency")
+    }
+    return key, s1.get("amount_of_approval") or 0
+
+def workflow_bucket(workflow: Dict[str, Any], status: Optional[str] = None) -> Dict[str, Any]:
+    """Rollup key a workflow contributes, bucketed by its creation day"""
+    return {
+        "day": day_bucket(workflow["created_at"]),
+        "approver_id": workflow["approver_id"],
+        "status": status or workflow["status"]
+    }
+
+def day_range(start: Optional[datetime], end: Optional[datetime]) -> Dict[str, Any]:
+    """$match stage condition for buckets between two timestamps (inclusive days)"""
+    condition = {}
+    if start:
+        condition["$gte"] = day_bucket(start)
+    if end:
+        condition["$lte"] = day_bucket(end)
+    return {"day": condition} if condition else {}
+
+class RollupService:
+    """Daily analytics buckets maintained incrementally from NFA and workflow changes
+
+    `nfa_daily_rollups` is keyed by (day, status, department, vendor_id, currency)
+    and `approval_daily_rollups` by (day, approver_id, status). Reports read these
+    so their cost depends on the number of days requested, not total history.
+    """
+
+    @staticmethod
+    async def record_nfa_change(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+        """Move an NFA's contribution from its old bucket to its new one"""
+        ops = []
+        old = nfa_bucket(before) if before else None
+        new = nfa_bucket(after) if after else None
+        if old == new:
+            return
+
+        if old:
+            key, amount = old
+            ops.append(UpdateOne(key, {"$inc": {"count": -1, "amount": -amount}}, upsert=True))
+        if new:
+            key, amount = new
+            ops.append(UpdateOne(key, {"$inc": {"count": 1, "amount": amount}}, upsert=True))
+
+        db = await get_database()
+        await db.nfa_daily_rollups.bulk_write(ops, ordered=False)
+
+    @staticmethod
+    async def record_workflows_created(workflows: List[Dict[str, Any]]):
+        if not workflows:
+            return
+        db = await get_database()
+        ops = [
+            UpdateOne(
+                workflow_bucket(workflow),
+                {"$inc": {"count": 1}, "$set": {"approver_name": workflow["approver_name"]}},
+                upsert=True
+            )
+            for workflow in workflows
+        ]
+        await db.approval_daily_rollups.bulk_write(ops, ordered=False)
+
+    @staticmethod
+    async def record_workflow_action(workflow: Dict[str, Any]):
+        """Move an acted-on workflow out of its pending bucket"""
+        db = await get_database()
+        await db.approval_daily_rollups.bulk_write([
+            UpdateOne(workflow_bucket(workflow, ApprovalStatus.PENDING.value), {"$inc": {"count": -1}}, upsert=True),
+            UpdateOne(
+                workflow_bucket(workflow),
+                {"$inc": {"count": 1}, "$set": {"approver_name": workflow["approver_name"]}},
+                upsert=True
+            )
+        ], ordered=False)
+
+    @staticmethod
+    async def record_workflows_deleted(workflows: List[Dict[str, Any]]):
+        if not workflows:
+            return
+        db = await get_database()
+        ops = [UpdateOne(workflow_bucket(workflow), {"$inc": {"count": -1}}) for workflow in workflows]
+        await db.approval_daily_rollups.bulk_write(ops, ordered=False)
+
+    @staticmethod
+    async def nfa_counts_by(field: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """NFA counts created in a date range, grouped by a bucket dimension"""
+        db = await get_database()
+        pipeline = [
+            {"$match": day_range(start, end)},
+            {"$group": {"_id": f"${field}", "count": {"$sum": "$count"}}},
+            {"$match": {"count": {"$gt": 0}}}
+        ]
+        return await db.nfa_daily_rollups.aggregate(pipeline).to_list(None)
+
+    @staticmethod
+    async def top_vendors(start: Optional[datetime] = None, end: Optional[datetime] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        db = await get_database()
+        pipeline = [
+            {"$match": {**day_range(start, end), "vendor_id": {"$ne": None}}},
+            {"$group": {"_id": "$vendor_id", "count": {"$sum": "$count"}}},
+            {"$match": {"count": {"$gt": 0}}},
+            {"$sort": {"count": -1}},
+            {"$limit": limit}
+        ]
+        return await db.nfa_daily_rollups.aggregate(pipeline).to_list(limit)
+
+    @staticmethod
+    async def approver_performance(start: Optional[datetime] = None, end: Optional[datetime] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        db = await get_database()
+
+        def status_sum(status: ApprovalStatus) -> Dict[str, Any]:
+            return {"$sum": {"$cond": [{"$eq": ["$status", status.value]}, "$count", 0]}}
+
+        pipeline = [
+            {"$match": day_range(start, end)},
+            {
+                "$group": {
+                    "_id": "$approver_id",
+                    "approver_name": {"$last": "$approver_name"},
+                    "total": {"$sum": "$count"},
+                    "approved": status_sum(ApprovalStatus.APPROVED),
+                    "rejected": status_sum(ApprovalStatus.REJECTED),
+                    "pending": status_sum(ApprovalStatus.PENDING)
+                }
+            },
+            {"$match": {"total": {"$gt": 0}}},
+            {"$sort": {"total": -1}},
+            {"$limit": limit}
+        ]
+        return await db.approval_daily_rollups.aggregate(pipeline).to_list(limit)
+
+    @staticmethod
+    async def rebuild_rollups():
+        """Backfill both rollup collections from the source collections"""
+        db = await get_database()
+        day = {"$dateTrunc": {"date": date_expr("created_at"), "unit": "day"}}
+
+        nfa_pipeline = [
+            {
+                "$group": {
+                    "_id": {
+                        "day": day,
+                        "status": "$status",
+                        "department": {"$ifNull": ["$section1_data.department", None]},
+                        "vendor_id": {"$ifNull": ["$section2_data.vendor_id", None]},
+                        "currency": {"$ifNull": ["$section1_data.currency", None]}
+                    },
+                    "count": {"$sum": 1},
+                    "amount": {"$sum": {"$ifNull": ["$section1_data.amount_of_approval", 0]}}
+                }
+            },
+            {"$replaceWith": {"$mergeObjects": ["$_id", {"count": "$count", "amount": "$amount"}]}}
+        ]
+        workflow_pipeline = [
+            {
+                "$group": {
+                    "_id": {"day": day, "approver_id": "$approver_id", "status": "$status"},
+                    "approver_name": {"$last": "$approver_name"},
+                    "count": {"$sum": 1}
+                }
+            },
+            {"$replaceWith": {"$mergeObjects": ["$_id", {"approver_name": "$approver_name", "count": "$count"}]}}
+        ]
+
+        # Built server-side into a scratch collection, indexed, then swapped in with one
+        # rename, so readers and incremental $inc updates never see an empty or half-built rollup
+        for name, source, pipeline in (
+            ("nfa_daily_rollups", db.nfa_requests, nfa_pipeline),
+            ("approval_daily_rollups", db.approval_workflows, workflow_pipeline)
+        ):
+            scratch = f"{name}_rebuild"
+            await source.aggregate(pipeline + [{"$out": scratch}]).to_list(None)
+            if not await db.list_collection_names(filter={"name": scratch}):
+                # Nothing to roll up; older servers create no $out collection for an empty result
+                await db[name].delete_many({})
+                continue
+            await reconcile_indexes(scratch, INDEX_SPECS[name])
+            await db[scratch].rename(name, dropTarget=True)
+
+        logger.info("Analytics rollups rebuilt")
@@ -0,0 +1,179 @@
+from typing import List, Dict, Any
+from datetime import datetime, timezone
+from core.database import get_database
+from core.timestamps import to_datetime, date_expr
+from models.schemas import NFAStatus, ApprovalStatus
+from pymongo import UpdateOne, ReplaceOne
+import logging
+
+logger = logging.getLogger(__name__)
+
+def month_key(value: Any) -> str:
+    return to_datetime(value).strftime("%Y-%m")
+
+class UserStatsService:
+    """Per-user dashboard counters kept in `user_stats`, maintained with $inc
+
+    Counters are updated alongside the primary writes rather than in the same
+    transaction, so rebuild_user_stats exists to correct any drift.
+    """
+
+    @staticmethod
+    async def record_nfa_created(nfa: Dict[str, Any]):
+        db = await get_database()
+        await db.user_stats.update_one(
+            {"_id": nfa["requestor_id"]},
+            {
+                "$inc": {
+                    "requestor.total": 1,
+                    f"requestor.by_status.{nfa['status']}": 1,
+                    f"requestor.monthly.{month_key(nfa['created_at'])}": 1
+                }
+            },
+            upsert=True
+        )
+
+    @staticmethod
+    async def record_nfa_status_change(requestor_id: str, old_status: str, new_status: str):
+        if old_status == new_status:
+            return
+        db = await get_database()
+        await db.user_stats.update_one(
+            {"_id": requestor_id},
+            {
+                "$inc": {
+                    f"requestor.by_status.{old_status}": -1,
+                    f"requestor.by_status.{new_status}": 1
+                }
+            },
+            upsert=True
+        )
+
+    @staticmethod
+    async def record_nfa_deleted(nfa: Dict[str, Any], workflows: List[Dict[str, Any]]):
+        db = await get_database()
+        ops = [
+            UpdateOne(
+                {"_id": nfa["requestor_id"]},
+                {
+                    "$inc": {
+                        "requestor.total": -1,
+                        f"requestor.by_status.{nfa['status']}": -1,
+                        f"requestor.monthly.{month_key(nfa['created_at'])}": -1
+                    }
+                }
+            )
+        ]
+        for workflow in workflows:
+            ops.append(UpdateOne(
+                {"_id": workflow["approver_id"]},
+                {"$inc": {"approver.total": -1, f"approver.by_status.{workflow['status']}": -1}}
+            ))
+        await db.user_stats.bulk_write(ops, ordered=False)
+
+    @staticmethod
+    async def record_workflows_created(workflows: List[Dict[str, Any]]):
+        if not workflows:
+            return
+        db = await get_database()
+        ops = [
+            UpdateOne(
+                {"_id": workflow["approver_id"]},
+                {"$inc": {"approver.total": 1, f"approver.by_status.{workflow['status']}": 1}},
+                upsert=True
+            )
+            for workflow in workflows
+        ]
+        await db.user_stats.bulk_write(ops, ordered=False)
+
+    @staticmethod
+    async def record_workflow_action(approver_id: str, new_status: str):
+        db = await get_database()
+        await db.user_stats.update_one(
+            {"_id": approver_id},
+            {
+                "$inc": {
+                    f"approver.by_status.{ApprovalStatus.PENDING.value}": -1,
+                    f"approver.by_status.{new_status}": 1
+                }
+            },
+            upsert=True
+        )
+
+    @staticmethod
+    async def get_user_stats(user_id: str) -> Dict[str, Any]:
+        """Dashboard counters for a user from a single document read"""
+        db = await get_database()
+        doc = await db.user_stats.find_one({"_id": user_id}) or {}
+
+        requestor = doc.get("requestor", {})
+        requestor_status = requestor.get("by_status", {})
+        approver = doc.get("approver", {})
+        approver_status = approver.get("by_status", {})
+
+        return {
+            "requestor": {
+                "total": requestor.get("total", 0),
+                "pending": (
+                    requestor_status.get(NFAStatus.SECTION1_PENDING.value, 0) +
+                    requestor_status.get(NFAStatus.SECTION2_PENDING.value, 0)
+                ),
+                "approved": requestor_status.get(NFAStatus.APPROVED.value, 0),
+                "this_month": requestor.get("monthly", {}).get(month_key(datetime.now(timezone.utc)), 0)
+            },
+            "approver": {
+                "total": approver.get("total", 0),
+                "pending": approver_status.get(ApprovalStatus.PENDING.value, 0),
+                "approved": approver_status.get(ApprovalStatus.APPROVED.value, 0),
+                "rejected": approver_status.get(ApprovalStatus.REJECTED.value, 0)
+            }
+        }
+
+    @staticmethod
+    async def rebuild_user_stats() -> int:
+        """Recompute every user's counters from the source collections"""
+        db = await get_database()
+        stats: Dict[str, Dict[str, Any]] = {}
+
+        def user_doc(user_id: str) -> Dict[str, Any]:
+            return stats.setdefault(user_id, {
+                "requestor": {"total": 0, "by_status": {}, "monthly": {}},
+                "approver": {"total": 0, "by_status": {}}
+            })
+
+        nfa_pipeline = [
+            {
+                "$group": {
+                    "_id": {
+                        "user": "$requestor_id",
+                        "status": "$status",
+                        "month": {"$dateToString": {"format": "%Y-%m", "date": date_expr("created_at")}}
+                    },
+                    "count": {"$sum": 1}
+                }
+            }
+        ]
+        async for row in db.nfa_requests.aggregate(nfa_pipeline):
+            requestor = user_doc(row["_id"]["user"])["requestor"]
+            status, month = row["_id"]["status"], row["_id"]["month"]
+            requestor["total"] += row["count"]
+            requestor["by_status"][status] = requestor["by_status"].get(status, 0) + row["count"]
+            requestor["monthly"][month] = requestor["monthly"].get(month, 0) + row["count"]
+
+        workflow_pipeline = [
+            {"$group": {"_id": {"user": "$approver_id", "status": "$status"}, "count": {"$sum": 1}}}
+        ]
+        async for row in db.approval_workflows.aggregate(workflow_pipeline):
+            approver = user_doc(row["_id"]["user"])["approver"]
+            approver["total"] += row["count"]
+            approver["by_status"][row["_id"]["status"]] = row["count"]
+
+        if stats:
+            await db.user_stats.bulk_write(
+                [ReplaceOne({"_id": user_id}, doc, upsert=True) for user_id, doc in stats.items()],
+                ordered=False
+            )
+        await db.user_stats.delete_many({"_id": {"$nin": list(stats)}})
+
+        logger.info(f"Rebuilt user stats for {len(stats)} user(s)")
+        return len(stats)
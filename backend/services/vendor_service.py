@@ -1,12 +1,17 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone
 from core.database import get_database
+from core.pagination import apply_keyset
+from pymongo import ReturnDocument
 from models.schemas import VendorCreate, VendorUpdate, VendorStatus
 import logging
 import uuid
 
 logger = logging.getLogger(__name__)
 
+# Keyset sort order for vendor listings, backed by the (name, id) compound indexes
+VENDOR_LIST_SORT = [("name", 1), ("id", 1)]
+
 class VendorService:
     @staticmethod
     async def create_vendor(vendor_data: VendorCreate) -> Dict[str, Any]:
@@ -27,8 +32,8 @@ class VendorService:
             "phone": vendor_data.phone,
             "address": vendor_data.address,
             "status": VendorStatus.ACTIVE.value,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         }
         
         await db.vendors.insert_one(vendor_doc)
@@ -45,32 +50,46 @@ class VendorService:
         return vendor
     
     @staticmethod
-    async def get_all_vendors(skip: int = 0, limit: int = 100, status: str = None) -> List[Dict[str, Any]]:
-        """Get all vendors"""
+    async def get_all_vendors(
+        skip: int = 0,
+        limit: int = 100,
+        status: str = None,
+        cursor: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get all vendors
+        
+        When a cursor is given it takes precedence over skip and pages by (name, id).
+        """
         db = await get_database()
         
         query = {}
         if status:
             query["status"] = status
         
-        vendors = await db.vendors.find(query, {"_id": 0}).sort("name", 1).skip(skip).limit(limit).to_list(limit)
+        query = apply_keyset(query, VENDOR_LIST_SORT, cursor)
+        find_cursor = db.vendors.find(query, {"_id": 0}).sort(VENDOR_LIST_SORT)
+        if not cursor:
+            find_cursor = find_cursor.skip(skip)
+        
+        vendors = await find_cursor.limit(limit).to_list(limit)
         return vendors
     
     @staticmethod
-    async def update_vendor(vendor_id: str, vendor_data: VendorUpdate) -> Dict[str, Any]:
+    async def update_vendor(vendor_id: str, vendor_data: VendorUpdate) -> Optional[Dict[str, Any]]:
         """Update vendor"""
         db = await get_database()
         
         update_data = {k: v for k, v in vendor_data.model_dump().items() if v is not None}
-        update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
+        update_data["updated_at"] = datetime.now(timezone.utc)
         
-        await db.vendors.update_one(
+        vendor = await db.vendors.find_one_and_update(
             {"id": vendor_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
         )
-        
-        vendor = await db.vendors.find_one({"id": vendor_id}, {"_id": 0})
-        logger.info(f"Vendor updated: {vendor_id}")
+        if vendor:
+            logger.info(f"Vendor updated: {vendor_id}")
         return vendor
     
     @staticmethod
@@ -24,4 +24,7 @@ celery_app.conf.update(
     worker_max_tasks_per_child=1000,
 )
 
+# Registers the per-process event loop and Mongo client with the worker lifecycle
+import tasks.runtime  # noqa: E402,F401
+
 logger.info("Celery app initialized")
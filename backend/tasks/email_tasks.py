@@ -1,16 +1,121 @@
 from tasks.celery_app import celery_app
+from tasks.runtime import runtime
+from tasks.smtp_pool import smtp_pool
+from tasks.mail_scheduler import mail_scheduler
 from core.config import settings
-import aiosmtplib
+from core.database import get_database
+from core.cache import TTLCache
+from core.security import SecurityService
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
-from email import encoders
+from datetime import datetime, timedelta, timezone
 import asyncio
+import base64
 import logging
+import os
+import socket
+import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
+runtime.add_shutdown_hook(smtp_pool.close)
+
+# Long enough for every retry of one message; a replay killed mid-send is retried after it
+DEAD_LETTER_LEASE_SECONDS = 600
+
+# Base64-encoded attachment payloads keyed by (path, mtime, size), so a changed file is re-read
+attachment_cache = TTLCache(settings.ATTACHMENT_CACHE_SIZE, 3600)
+
+def read_encoded(path: str) -> str:
+    with open(path, "rb") as f:
+        return base64.encodebytes(f.read()).decode("ascii")
+
+async def attachment_part(path: str) -> MIMEBase:
+    """MIME part for a file, encoding it at most once per version of the file"""
+    stat = await asyncio.to_thread(os.stat, path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    
+    encoded = attachment_cache.get(key)
+    if encoded is None:
+        # Reading and encoding stay off the event loop
+        encoded = await asyncio.to_thread(read_encoded, path)
+        attachment_cache.set(key, encoded)
+    
+    part = MIMEBase("application", "octet-stream")
+    part.set_payload(encoded)
+    part["Content-Transfer-Encoding"] = "base64"
+    part.add_header("Content-Disposition", "attachment", filename=os.path.basename(path))
+    return part
+
+def signed_pdf_link(nfa_id: str) -> str:
+    expires = int(time.time()) + settings.DOWNLOAD_LINK_TTL_SECONDS
+    signature = SecurityService.sign_download(nfa_id, expires)
+    return f"{settings.APP_BASE_URL}/api/nfa/{nfa_id}/pdf?expires={expires}&signature={signature}"
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+_mail_stats_published_at = 0.0
+
+async def publish_mail_stats():
+    """Write this process's mail counters to mail_metrics, at most once per interval
+    
+    Under the prefork pool every send happens in a child process, so the
+    counters are shared through Mongo for system-health to read.
+    """
+    global _mail_stats_published_at
+    now = time.monotonic()
+    if now - _mail_stats_published_at < settings.MAIL_METRICS_INTERVAL_SECONDS:
+        return
+    _mail_stats_published_at = now
+    
+    try:
+        db = await get_database()
+        await db.mail_metrics.update_one(
+            {"_id": worker_id()},
+            {"$set": {**mail_scheduler.stats(), "updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+    except Exception as e:
+        logger.warning(f"Failed to publish mail stats: {e}")
+
+async def retire_mail_stats():
+    try:
+        db = await get_database()
+        await db.mail_metrics.delete_one({"_id": worker_id()})
+    except Exception as e:
+        logger.warning(f"Failed to remove mail stats: {e}")
+
+runtime.add_shutdown_hook(retire_mail_stats)
+
 class EmailService:
+    @staticmethod
+    async def deliver(
+        to_email: str,
+        subject: str,
+        body: str,
+        attachment_path: str = None
+    ):
+        """Build and send an email, raising the final error if it cannot be delivered"""
+        message = MIMEMultipart()
+        message["From"] = f"{settings.EMAIL_FROM_NAME} <{settings.EMAIL_FROM}>"
+        message["To"] = to_email
+        message["Subject"] = subject
+        
+        # Add body
+        message.attach(MIMEText(body, "html"))
+        
+        # Add attachment if provided
+        if attachment_path:
+            message.attach(await attachment_part(attachment_path))
+        
+        # Send email through the throttled, retrying scheduler
+        await mail_scheduler.send(message)
+        
+        logger.info(f"Email sent to: {to_email}")
+    
     @staticmethod
     async def send_email_async(
         to_email: str,
@@ -20,48 +125,34 @@ class EmailService:
     ):
         """Send email asynchronously"""
         try:
-            message = MIMEMultipart()
-            message["From"] = f"{settings.EMAIL_FROM_NAME} <{settings.EMAIL_FROM}>"
-            message["To"] = to_email
-            message["Subject"] = subject
-            
-            # Add body
-            message.attach(MIMEText(body, "html"))
-            
-            # Add attachment if provided
-            if attachment_path:
-                with open(attachment_path, "rb") as attachment:
-                    part = MIMEBase("application", "octet-stream")
-                    part.set_payload(attachment.read())
-                    encoders.encode_base64(part)
-                    part.add_header(
-                        "Content-Disposition",
-                        f"attachment; filename= {attachment_path.split('/')[-1]}",
-                    )
-                    message.attach(part)
-            
-            # Send email
-            await aiosmtplib.send(
-                message,
-                hostname=settings.EMAIL_HOST,
-                port=settings.EMAIL_PORT,
-                username=settings.EMAIL_USERNAME,
-                password=settings.EMAIL_PASSWORD,
-                start_tls=True
-            )
-            
-            logger.info(f"Email sent to: {to_email}")
+            await EmailService.deliver(to_email, subject, body, attachment_path)
             return True
         except Exception as e:
             logger.error(f"Failed to send email to {to_email}: {e}")
+            await EmailService.dead_letter(to_email, subject, body, attachment_path, e)
             return False
-
-@celery_app.task(name="tasks.send_approval_notification")
-def send_approval_notification(nfa_id: str, approver_email: str, approver_name: str, nfa_details: dict):
-    """Send approval notification email"""
-    subject = f"NFA Approval Required - {nfa_details.get('subject', 'N/A')}"
+        finally:
+            await publish_mail_stats()
     
-    body = f"""
+    @staticmethod
+    async def dead_letter(to_email: str, subject: str, body: str, attachment_path: str, error: Exception):
+        """Keep an undeliverable email in mail_dead_letters so it can be replayed"""
+        try:
+            db = await get_database()
+            await db.mail_dead_letters.insert_one({
+                "id": str(uuid.uuid4()),
+                "to_email": to_email,
+                "subject": subject,
+                "body": body,
+                "attachment_path": attachment_path,
+                "error": repr(error),
+                "failed_at": datetime.now(timezone.utc)
+            })
+        except Exception as e:
+            logger.error(f"Failed to dead-letter email to {to_email}: {e}")
+
+def approval_request_body(nfa_id: str, approver_name: str, nfa_details: dict) -> str:
+    return f"""
     <html>
     <body style="font-family: Arial, sans-serif;">
         <h2>NFA Approval Request</h2>
@@ -90,7 +181,7 @@ def send_approval_notification(nfa_id: str, approver_email: str, approver_name:
             </tr>
         </table>
         <p style="margin-top: 20px;">
-            <a href="https://approval-flow-33.preview.emergentagent.com/approvals/{nfa_id}" 
+            <a href="{settings.APP_BASE_URL}/approvals/{nfa_id}" 
                style="background-color: #4CAF50; color: white; padding: 12px 24px; text-decoration: none; border-radius: 4px;">
                 Review & Approve
             </a>
@@ -101,17 +192,79 @@ def send_approval_notification(nfa_id: str, approver_email: str, approver_name:
     </body>
     </html>
     """
+
+def approval_digest_body(approver_name: str, items: list) -> str:
+    rows = "".join(f"""
+            <tr>
+                <td style="padding: 8px; border: 1px solid #ddd;">
+                    <a href="{settings.APP_BASE_URL}/approvals/{item['nfa_id']}">{item['details'].get('subject', 'N/A')}</a>
+                </td>
+                <td style="padding: 8px; border: 1px solid #ddd;">{item['details'].get('requestor_name', 'N/A')}</td>
+                <td style="padding: 8px; border: 1px solid #ddd;">{item['details'].get('department', 'N/A')}</td>
+                <td style="padding: 8px; border: 1px solid #ddd;">{item['details'].get('currency', 'INR')} {item['details'].get('amount', 0):,.2f}</td>
+            </tr>""" for item in items)
+    
+    return f"""
+    <html>
+    <body style="font-family: Arial, sans-serif;">
+        <h2>NFA Approval Requests</h2>
+        <p>Dear {approver_name},</p>
+        <p>You have {len(items)} new NFA approval requests:</p>
+        <table style="border-collapse: collapse; width: 100%; max-width: 800px;">
+            <tr>
+                <th style="padding: 8px; border: 1px solid #ddd; text-align: left;">Subject</th>
+                <th style="padding: 8px; border: 1px solid #ddd; text-align: left;">Requestor</th>
+                <th style="padding: 8px; border: 1px solid #ddd; text-align: left;">Department</th>
+                <th style="padding: 8px; border: 1px solid #ddd; text-align: left;">Amount</th>
+            </tr>{rows}
+        </table>
+        <p style="color: #666; margin-top: 20px;">Please review and take action at your earliest convenience.</p>
+        <hr style="margin-top: 30px;">
+        <p style="color: #999; font-size: 12px;">This is an automated email from HCIL NFA Automation System.</p>
+    </body>
+    </html>
+    """
+
+@celery_app.task(name="tasks.send_approval_notification")
+def send_approval_notification(nfa_id: str, approver_email: str, approver_name: str, nfa_details: dict):
+    """Send approval notification email"""
+    subject = f"NFA Approval Required - {nfa_details.get('subject', 'N/A')}"
+    
+    body = approval_request_body(nfa_id, approver_name, nfa_details)
     
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(EmailService.send_email_async(approver_email, subject, body))
-        loop.close()
-        return result
+        return runtime.run(EmailService.send_email_async(approver_email, subject, body))
     except Exception as e:
         logger.error(f"Error in send_approval_notification: {e}")
         return False
 
+@celery_app.task(name="tasks.send_approval_digest")
+def send_approval_digest(approver_id: str):
+    """Send an approver's buffered approval requests as one email"""
+    from services.digest_service import DigestService
+    
+    async def flush():
+        digest = await DigestService.take(approver_id)
+        if not digest or not digest.get("items"):
+            return True
+        
+        items = digest["items"]
+        if len(items) == 1:
+            item = items[0]
+            subject = f"NFA Approval Required - {item['details'].get('subject', 'N/A')}"
+            body = approval_request_body(item["nfa_id"], digest["name"], item["details"])
+        else:
+            subject = f"NFA Approvals Required - {len(items)} requests"
+            body = approval_digest_body(digest["name"], items)
+        
+        return await EmailService.send_email_async(digest["email"], subject, body)
+    
+    try:
+        return runtime.run(flush())
+    except Exception as e:
+        logger.error(f"Error in send_approval_digest: {e}")
+        return False
+
 @celery_app.task(name="tasks.send_coordinator_notification")
 def send_coordinator_notification(nfa_id: str, coordinator_email: str):
     """Send notification to coordinator after Section 1 approval"""
@@ -125,7 +278,7 @@ def send_coordinator_notification(nfa_id: str, coordinator_email: str):
         <p>Section 1 approvals are complete for NFA: <strong>{nfa_id}</strong></p>
         <p>Please proceed with vendor selection and Section 2 processing.</p>
         <p style="margin-top: 20px;">
-            <a href="https://approval-flow-33.preview.emergentagent.com/coordinator/{nfa_id}" 
+            <a href="{settings.APP_BASE_URL}/coordinator/{nfa_id}" 
                style="background-color: #2196F3; color: white; padding: 12px 24px; text-decoration: none; border-radius: 4px;">
                 Process Section 2
             </a>
@@ -137,20 +290,22 @@ def send_coordinator_notification(nfa_id: str, coordinator_email: str):
     """
     
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(EmailService.send_email_async(coordinator_email, subject, body))
-        loop.close()
-        return result
+        return runtime.run(EmailService.send_email_async(coordinator_email, subject, body))
     except Exception as e:
         logger.error(f"Error in send_coordinator_notification: {e}")
         return False
 
 @celery_app.task(name="tasks.send_final_nfa_notification")
 def send_final_nfa_notification(nfa_id: str, requestor_email: str, nfa_number: str, pdf_path: str = None):
-    """Send final NFA notification with PDF"""
+    """Send final NFA notification with PDF, linked rather than attached when large"""
     subject = f"NFA Approved - {nfa_number}"
     
+    if pdf_path and os.path.isfile(pdf_path) and os.path.getsize(pdf_path) > settings.ATTACHMENT_LINK_THRESHOLD_BYTES:
+        document_note = f'''The approved NFA document can be <a href="{signed_pdf_link(nfa_id)}">downloaded here</a>.'''
+        pdf_path = None
+    else:
+        document_note = "Please find the approved NFA document attached."
+    
     body = f"""
     <html>
     <body style="font-family: Arial, sans-serif;">
@@ -167,7 +322,7 @@ def send_final_nfa_notification(nfa_id: str, requestor_email: str, nfa_number: s
                 <td style="padding: 8px; border: 1px solid #ddd;">{nfa_id}</td>
             </tr>
         </table>
-        <p style="margin-top: 20px;">Please find the approved NFA document attached.</p>
+        <p style="margin-top: 20px;">{document_note}</p>
         <hr style="margin-top: 30px;">
         <p style="color: #999; font-size: 12px;">This is an automated email from HCIL NFA Automation System.</p>
     </body>
@@ -175,13 +330,54 @@ def send_final_nfa_notification(nfa_id: str, requestor_email: str, nfa_number: s
     """
     
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(
-            EmailService.send_email_async(requestor_email, subject, body, pdf_path)
-        )
-        loop.close()
-        return result
+        return runtime.run(EmailService.send_email_async(requestor_email, subject, body, pdf_path))
     except Exception as e:
         logger.error(f"Error in send_final_nfa_notification: {e}")
         return False
+
+@celery_app.task(name="tasks.replay_dead_letter")
+def replay_dead_letter(letter_id: str):
+    """Resend a dead-lettered email, removing it only once it has been delivered
+    
+    The letter is leased for DEAD_LETTER_LEASE_SECONDS while it is resent, so
+    concurrent replays skip it and a replay killed mid-send leaves it in place
+    to be replayed again.
+    """
+    async def replay():
+        db = await get_database()
+        now = datetime.now(timezone.utc)
+        letter = await db.mail_dead_letters.find_one_and_update(
+            {
+                "id": letter_id,
+                "$or": [{"replaying_until": {"$exists": False}}, {"replaying_until": {"$lt": now}}]
+            },
+            {"$set": {"replaying_until": now + timedelta(seconds=DEAD_LETTER_LEASE_SECONDS)}}
+        )
+        if not letter:
+            return False
+        
+        try:
+            await EmailService.deliver(
+                letter["to_email"], letter["subject"], letter["body"], letter.get("attachment_path")
+            )
+        except Exception as e:
+            logger.error(f"Replay of dead letter {letter_id} failed: {e}")
+            await db.mail_dead_letters.update_one(
+                {"id": letter_id},
+                {
+                    "$set": {"error": repr(e), "failed_at": datetime.now(timezone.utc)},
+                    "$unset": {"replaying_until": ""}
+                }
+            )
+            return False
+        finally:
+            await publish_mail_stats()
+        
+        await db.mail_dead_letters.delete_one({"id": letter_id})
+        return True
+    
+    try:
+        return runtime.run(replay())
+    except Exception as e:
+        logger.error(f"Error in replay_dead_letter: {e}")
+        return False
@@ -0,0 +1,132 @@
+from typing import Any, Dict
+from email.message import Message
+from core.config import settings
+from tasks.smtp_pool import SMTPPool, smtp_pool
+import aiosmtplib
+import asyncio
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+# Failures worth retrying: the relay or network is unavailable, not the message rejected
+TRANSIENT_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    ConnectionError,
+    asyncio.TimeoutError,
+    OSError
+)
+
+def is_transient(error: Exception) -> bool:
+    """4xx replies and connection failures are temporary; 5xx replies are final"""
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return 400 <= error.code < 500
+    return isinstance(error, TRANSIENT_ERRORS)
+
+class RateLimiter:
+    """Token bucket allowing `rate` acquisitions per second with bursts of `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        # Waiters are served in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class MailScheduler:
+    """Throttled, retrying front end to the SMTP pool
+
+    Sends are limited to SMTP_RATE_PER_SECOND and, through the pool, to
+    SMTP_POOL_SIZE concurrent connections. Transient failures are retried
+    with full-jitter exponential backoff; the final error is raised so the
+    caller can dead-letter the message. Limits apply per worker process.
+    """
+
+    def __init__(
+        self,
+        pool: SMTPPool,
+        rate: float,
+        burst: int,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float
+    ):
+        self.pool = pool
+        self.limiter = RateLimiter(rate, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.queue_depth = 0
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def send(self, message: Message) -> int:
+        """Send a message, returning the number of attempts it took"""
+        self.queue_depth += 1
+        queued_at = time.monotonic()
+        try:
+            for attempt in range(self.max_retries + 1):
+                await self.limiter.acquire()
+                try:
+                    await self.pool.send_message(message)
+                except Exception as e:
+                    if not is_transient(e) or attempt == self.max_retries:
+                        self.failed += 1
+                        raise
+                    delay = self.backoff(attempt)
+                    self.retries += 1
+                    logger.warning(f"Transient SMTP failure ({e!r}); retry {attempt + 1} in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+
+                latency = time.monotonic() - queued_at
+                self.sent += 1
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+                return attempt + 1
+        finally:
+            self.queue_depth -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "avg_latency_ms": round(self._latency_total / self.sent * 1000, 1) if self.sent else 0,
+            "max_latency_ms": round(self._latency_max * 1000, 1),
+            "rate_per_second": self.limiter.rate,
+            "pool": self.pool.stats()
+        }
+
+mail_scheduler = MailScheduler(
+    smtp_pool,
+    settings.SMTP_RATE_PER_SECOND,
+    settings.SMTP_RATE_BURST,
+    settings.SMTP_MAX_RETRIES,
+    settings.SMTP_BACKOFF_BASE_SECONDS,
+    settings.SMTP_BACKOFF_MAX_SECONDS
+)
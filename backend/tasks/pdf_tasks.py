@@ -1,11 +1,63 @@
 from tasks.celery_app import celery_app
+from tasks.runtime import runtime
+from core.database import get_database
+from core.timestamps import format_date
 from weasyprint import HTML, CSS
+from weasyprint.text.fonts import FontConfiguration
+from celery.signals import worker_process_init
 from datetime import datetime
+from typing import Optional
+import asyncio
 import logging
 import os
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Shared stylesheet for NFA documents, parsed once per worker by PDFRenderer
+NFA_PDF_CSS = """
+body { font-family: Arial, sans-serif; font-size: 10pt; margin: 20px; }
+.header { text-align: center; margin-bottom: 20px; border-bottom: 2px solid #000; padding-bottom: 10px; }
+.header h1 { margin: 0; font-size: 14pt; }
+.header p { margin: 5px 0; }
+table { width: 100%; border-collapse: collapse; margin-bottom: 15px; }
+table, th, td { border: 1px solid #000; }
+th, td { padding: 6px; text-align: left; }
+th { background-color: #f0f0f0; font-weight: bold; }
+.section-title { background-color: #e0e0e0; font-weight: bold; padding: 8px; margin-top: 15px; }
+.signature-container { display: flex; justify-content: space-between; margin-top: 20px; }
+.signature-box { border: 1px solid #000; padding: 10px; width: 30%; min-height: 80px; }
+.footer { margin-top: 30px; padding-top: 10px; border-top: 2px solid #000; }
+"""
+
+class PDFRenderer:
+    """Warm WeasyPrint context: the stylesheet and font configuration are built
+    once per worker process and reused for every document
+    """
+    
+    def __init__(self):
+        self.font_config: Optional[FontConfiguration] = None
+        self.stylesheet: Optional[CSS] = None
+        # WeasyPrint objects are not documented as thread-safe; renders share them
+        self._lock = threading.Lock()
+    
+    def warm(self):
+        with self._lock:
+            if self.stylesheet is None:
+                self.font_config = FontConfiguration()
+                self.stylesheet = CSS(string=NFA_PDF_CSS, font_config=self.font_config)
+    
+    def render(self, html: str, target: str):
+        self.warm()
+        with self._lock:
+            HTML(string=html).write_pdf(target, stylesheets=[self.stylesheet], font_config=self.font_config)
+
+pdf_renderer = PDFRenderer()
+
+@worker_process_init.connect
+def warm_pdf_renderer(**kwargs):
+    pdf_renderer.warm()
+
 class PDFService:
     @staticmethod
     def generate_nfa_html(nfa_data: dict, approval_history: list) -> str:
@@ -23,7 +75,7 @@ class PDFService:
             <div class="signature-box">
                 <p><strong>Name:</strong> {approval['approver_name']}</p>
                 <p><strong>Designation:</strong> {approval['approver_designation']}</p>
-                <p><strong>Date:</strong> {approval.get('action_timestamp', '')[:10] if approval.get('action_timestamp') else 'Pending'}</p>
+                <p><strong>Date:</strong> {format_date(approval.get('action_timestamp'), 'Pending')}</p>
             </div>
             """
         
@@ -33,7 +85,7 @@ class PDFService:
             <div class="signature-box">
                 <p><strong>Name:</strong> {approval['approver_name']}</p>
                 <p><strong>Designation:</strong> {approval['approver_designation']}</p>
-                <p><strong>Date:</strong> {approval.get('action_timestamp', '')[:10] if approval.get('action_timestamp') else 'Pending'}</p>
+                <p><strong>Date:</strong> {format_date(approval.get('action_timestamp'), 'Pending')}</p>
             </div>
             """
         
@@ -42,20 +94,6 @@ class PDFService:
         <html>
         <head>
             <meta charset="UTF-8">
-            <style>
-                body {{ font-family: Arial, sans-serif; font-size: 10pt; margin: 20px; }}
-                .header {{ text-align: center; margin-bottom: 20px; border-bottom: 2px solid #000; padding-bottom: 10px; }}
-                .header h1 {{ margin: 0; font-size: 14pt; }}
-                .header p {{ margin: 5px 0; }}
-                table {{ width: 100%; border-collapse: collapse; margin-bottom: 15px; }}
-                table, th, td {{ border: 1px solid #000; }}
-                th, td {{ padding: 6px; text-align: left; }}
-                th {{ background-color: #f0f0f0; font-weight: bold; }}
-                .section-title {{ background-color: #e0e0e0; font-weight: bold; padding: 8px; margin-top: 15px; }}
-                .signature-container {{ display: flex; justify-content: space-between; margin-top: 20px; }}
-                .signature-box {{ border: 1px solid #000; padding: 10px; width: 30%; min-height: 80px; }}
-                .footer {{ margin-top: 30px; padding-top: 10px; border-top: 2px solid #000; }}
-            </style>
         </head>
         <body>
             <div class="header">
@@ -82,7 +120,7 @@ class PDFService:
                     <th>DEPARTMENT</th>
                     <td>{s1.get('department', '')}</td>
                     <th>DATE</th>
-                    <td>{nfa_data.get('created_at', '')[:10]}</td>
+                    <td>{format_date(nfa_data.get('created_at'))}</td>
                 </tr>
             </table>
             
@@ -191,15 +229,8 @@ class PDFService:
 def generate_nfa_pdf(nfa_id: str):
     """Generate PDF for NFA"""
     try:
-        # Import here to avoid circular imports
-        import asyncio
-        from motor.motor_asyncio import AsyncIOMotorClient
-        from core.config import settings
-        
         async def async_generate():
-            # Connect to database
-            client = AsyncIOMotorClient(settings.MONGO_URL)
-            db = client[settings.DB_NAME]
+            db = await get_database()
             
             # Get NFA data
             nfa = await db.nfa_requests.find_one({"id": nfa_id}, {"_id": 0})
@@ -220,36 +251,32 @@ def generate_nfa_pdf(nfa_id: str):
             pdf_dir = "/app/backend/generated_pdfs"
             os.makedirs(pdf_dir, exist_ok=True)
             
-            # Generate PDF
+            # Generate PDF off the runtime loop with the shared stylesheet and fonts
             pdf_path = f"{pdf_dir}/NFA_{nfa_id}.pdf"
-            HTML(string=html_content).write_pdf(pdf_path)
+            await asyncio.to_thread(pdf_renderer.render, html_content, pdf_path)
             
             logger.info(f"PDF generated: {pdf_path}")
             
             # Finalize NFA
             from services.nfa_service import NFAService
-            await NFAService.finalize_nfa(nfa_id, pdf_path)
+            finalized = await NFAService.finalize_nfa(nfa_id, pdf_path)
+            if not finalized:
+                return False
             
             # Send notification
             from tasks.email_tasks import send_final_nfa_notification
-            requestor = await db.users.find_one({"id": nfa["requestor_id"]}, {"_id": 0})
+            requestor = await db.users.find_one({"id": nfa["requestor_id"]}, {"_id": 0, "email": 1})
             if requestor:
                 send_final_nfa_notification.delay(
                     nfa_id,
                     requestor["email"],
-                    nfa.get("nfa_number", "DRAFT"),
+                    finalized["nfa_number"],
                     pdf_path
                 )
             
-            client.close()
             return True
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(async_generate())
-        loop.close()
-        
-        return result
+        return runtime.run(async_generate())
     except Exception as e:
         logger.error(f"Error generating PDF for NFA {nfa_id}: {e}")
         return False
@@ -0,0 +1,95 @@
+from typing import Any, Awaitable, Callable, Coroutine, List, Optional
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+from motor.motor_asyncio import AsyncIOMotorClient
+from core.config import settings
+from core.database import db_instance
+from core.timestamps import load_timestamp_state
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class WorkerRuntime:
+    """One event loop and one pooled Motor client per Celery worker process
+
+    The loop runs in a background thread, so tasks from any pool type (prefork,
+    threads, solo) submit coroutines to it and block on the result. The Motor
+    client is installed as `db_instance`, which lets services called from tasks
+    use get_database() exactly as they do in the API.
+    """
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._shutdown_hooks: List[Callable[[], Awaitable[Any]]] = []
+
+    def start(self):
+        with self._lock:
+            if self.loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="worker-runtime", daemon=True)
+            thread.start()
+            asyncio.run_coroutine_threadsafe(self._connect(), loop).result()
+            self.loop, self.thread = loop, thread
+        logger.info("Worker runtime started")
+
+    async def _connect(self):
+        # Created on the runtime loop so Motor binds to it
+        db_instance.client = AsyncIOMotorClient(
+            settings.MONGO_URL,
+            tz_aware=True,
+            maxPoolSize=settings.WORKER_MONGO_POOL_SIZE
+        )
+        db_instance.db = db_instance.client[settings.DB_NAME]
+        await load_timestamp_state(db_instance.db)
+
+    def add_shutdown_hook(self, hook: Callable[[], Awaitable[Any]]):
+        """Register a coroutine function to run on the runtime loop before it stops"""
+        self._shutdown_hooks.append(hook)
+
+    async def _shutdown(self):
+        for hook in self._shutdown_hooks:
+            try:
+                await hook()
+            except Exception as e:
+                logger.warning(f"Worker runtime shutdown hook failed: {e}")
+        if db_instance.client:
+            db_instance.client.close()
+            db_instance.client = db_instance.db = None
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the runtime loop and wait for its result"""
+        if self.loop is None:
+            # Pools without worker_process_init (solo, threads) start on first use
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def stop(self):
+        with self._lock:
+            if self.loop is None:
+                return
+            loop, thread = self.loop, self.thread
+            self.loop = self.thread = None
+
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=10)
+        except Exception as e:
+            logger.warning(f"Worker runtime shutdown incomplete: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=10)
+        loop.close()
+        logger.info("Worker runtime stopped")
+
+runtime = WorkerRuntime()
+
+@worker_process_init.connect
+def start_worker_runtime(**kwargs):
+    runtime.start()
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def stop_worker_runtime(**kwargs):
+    runtime.stop()
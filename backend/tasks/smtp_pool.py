@@ -0,0 +1,119 @@
+from typing import Any, Dict, List
+from email.message import Message
+from core.config import settings
+import aiosmtplib
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class PooledConnection:
+    def __init__(self, smtp: aiosmtplib.SMTP):
+        self.smtp = smtp
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+class SMTPPool:
+    """Persistent, authenticated SMTP connections shared by tasks in a worker process
+
+    Connections are reused across messages and retired after `max_messages`
+    or when idle longer than `idle_timeout` (relays drop idle sessions). A
+    reused connection the server has closed is redialled once transparently.
+    Lives on the worker runtime loop.
+    """
+
+    def __init__(self, size: int, max_messages: int, idle_timeout: float):
+        self.size = size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self._idle: List[PooledConnection] = []
+        self._slots = asyncio.Semaphore(size)
+        self.connections_opened = 0
+        self.reconnects = 0
+        self.messages_sent = 0
+
+    async def _dial(self) -> PooledConnection:
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.EMAIL_HOST,
+            port=settings.EMAIL_PORT,
+            username=settings.EMAIL_USERNAME or None,
+            password=settings.EMAIL_PASSWORD or None,
+            start_tls=settings.EMAIL_START_TLS
+        )
+        # Connects, upgrades with STARTTLS and logs in
+        await smtp.connect()
+        self.connections_opened += 1
+        return PooledConnection(smtp)
+
+    async def _checkout(self) -> PooledConnection:
+        while self._idle:
+            conn = self._idle.pop()
+            if conn.smtp.is_connected and time.monotonic() - conn.last_used < self.idle_timeout:
+                return conn
+            await self._retire(conn)
+        return await self._dial()
+
+    async def _checkin(self, conn: PooledConnection):
+        conn.messages_sent += 1
+        conn.last_used = time.monotonic()
+        self.messages_sent += 1
+        if conn.messages_sent >= self.max_messages:
+            await self._retire(conn)
+        else:
+            self._idle.append(conn)
+
+    async def _retire(self, conn: PooledConnection):
+        try:
+            if conn.smtp.is_connected:
+                await conn.smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            conn.smtp.close()
+
+    async def send_message(self, message: Message) -> Dict[str, Any]:
+        """Send on a pooled connection, waiting for a free slot if all are busy"""
+        async with self._slots:
+            conn = await self._checkout()
+            reused = conn.messages_sent > 0
+            try:
+                result = await conn.smtp.send_message(message)
+            except (aiosmtplib.SMTPServerDisconnected, ConnectionError) as e:
+                conn.smtp.close()
+                if not reused:
+                    raise
+                # The relay closed a kept-alive session; dial once more
+                logger.info(f"Pooled SMTP connection dropped ({e}); reconnecting")
+                self.reconnects += 1
+                conn = await self._dial()
+                try:
+                    result = await conn.smtp.send_message(message)
+                except Exception:
+                    conn.smtp.close()
+                    raise
+            except Exception:
+                # Connection state is unknown after a failed transaction
+                await self._retire(conn)
+                raise
+
+            await self._checkin(conn)
+            return result
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await self._retire(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "connections_opened": self.connections_opened,
+            "reconnects": self.reconnects,
+            "messages_sent": self.messages_sent
+        }
+
+smtp_pool = SMTPPool(
+    settings.SMTP_POOL_SIZE,
+    settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+    settings.SMTP_IDLE_TIMEOUT_SECONDS
+)
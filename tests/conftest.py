@@ -0,0 +1,76 @@
+import asyncio
+import os
+import pytest
+import socket
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+# Settings are read at import time; tests never reach these services
+for name, value in {
+    "MONGO_URL": "mongodb://127.0.0.1:27017",
+    "DB_NAME": "nfa_automation_test",
+    "JWT_SECRET_KEY": "test-secret",
+    "EMAIL_HOST": "127.0.0.1",
+    "EMAIL_USERNAME": "",
+    "EMAIL_PASSWORD": "",
+    "EMAIL_FROM": "nfa@example.com",
+    "EMAIL_START_TLS": "false",
+    "SUPERADMIN_USERNAME": "superadmin",
+    "SUPERADMIN_PASSWORD": "Admin@123",
+    "SUPERADMIN_EMAIL": "superadmin@example.com",
+}.items():
+    os.environ.setdefault(name, value)
+
+from aiosmtpd.controller import Controller  # noqa: E402
+from core.config import settings  # noqa: E402
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class SMTPSink:
+    """Local SMTP server that records what it receives
+
+    Replies queued in `failures` are returned, in order, to the next DATA
+    commands instead of accepting the message. `peers` holds the client
+    address of every session that delivered mail, i.e. one per connection.
+    With `hang_up` set, the server closes each session shortly after
+    accepting a message, as relays do with kept-alive connections.
+    """
+
+    def __init__(self, port: int):
+        self.port = port
+        self.messages = []
+        self.failures = []
+        self.peers = set()
+        self.hang_up = False
+        self.controller = Controller(self, hostname="127.0.0.1", port=port)
+
+    async def handle_DATA(self, server, session, envelope):
+        self.peers.add(session.peer)
+        if self.failures:
+            return self.failures.pop(0)
+        self.messages.append(envelope)
+        if self.hang_up:
+            # After the reply has gone out
+            asyncio.get_running_loop().call_later(0.05, server.transport.close)
+        return "250 Message accepted for delivery"
+
+@pytest.fixture
+def smtp_sink(monkeypatch):
+    sink = SMTPSink(free_port())
+    sink.controller.start()
+    monkeypatch.setattr(settings, "EMAIL_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "EMAIL_PORT", sink.port)
+    monkeypatch.setattr(settings, "EMAIL_USERNAME", "")
+    monkeypatch.setattr(settings, "EMAIL_PASSWORD", "")
+    monkeypatch.setattr(settings, "EMAIL_START_TLS", False)
+    yield sink
+    sink.controller.stop()
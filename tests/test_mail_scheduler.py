@@ -0,0 +1,102 @@
+from tasks.mail_scheduler import MailScheduler, is_transient
+from tasks.smtp_pool import SMTPPool
+from tests.test_smtp_pool import make_message
+import aiosmtplib
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+def make_scheduler(max_retries: int) -> MailScheduler:
+    pool = SMTPPool(size=2, max_messages=100, idle_timeout=60)
+    # No throttling or backoff delay, so retries run back to back
+    return MailScheduler(pool, rate=0, burst=1, max_retries=max_retries, backoff_base=0, backoff_max=0)
+
+def test_classifies_reply_codes():
+    assert is_transient(aiosmtplib.SMTPDataError(451, "Try again later"))
+    assert is_transient(aiosmtplib.SMTPServerDisconnected("gone"))
+    assert not is_transient(aiosmtplib.SMTPDataError(554, "Rejected"))
+
+async def test_retries_transient_failures(smtp_sink):
+    scheduler = make_scheduler(max_retries=3)
+    smtp_sink.failures.extend(["451 Try again later", "450 Mailbox busy"])
+
+    attempts = await scheduler.send(make_message(0))
+    await scheduler.pool.close()
+
+    assert attempts == 3
+    assert len(smtp_sink.messages) == 1
+    assert scheduler.stats()["retries"] == 2
+    assert scheduler.stats()["sent"] == 1
+    assert scheduler.stats()["queue_depth"] == 0
+
+async def test_gives_up_after_max_retries(smtp_sink):
+    scheduler = make_scheduler(max_retries=2)
+    smtp_sink.failures.extend(["451 Try again later"] * 3)
+
+    with pytest.raises(aiosmtplib.SMTPResponseException) as error:
+        await scheduler.send(make_message(0))
+    await scheduler.pool.close()
+
+    assert error.value.code == 451
+    assert smtp_sink.messages == []
+    assert scheduler.stats()["retries"] == 2
+    assert scheduler.stats()["failed"] == 1
+
+async def test_does_not_retry_permanent_failures(smtp_sink):
+    scheduler = make_scheduler(max_retries=3)
+    smtp_sink.failures.extend(["554 Rejected", "554 Rejected"])
+
+    with pytest.raises(aiosmtplib.SMTPResponseException):
+        await scheduler.send(make_message(0))
+    await scheduler.pool.close()
+
+    assert smtp_sink.failures == ["554 Rejected"]
+    assert scheduler.stats()["retries"] == 0
+
+async def test_undeliverable_email_is_dead_lettered(smtp_sink, monkeypatch):
+    from tasks import email_tasks
+    from tasks.email_tasks import EmailService
+
+    dead_letters = []
+
+    async def record_dead_letter(to_email, subject, body, attachment_path, error):
+        dead_letters.append((to_email, subject, error))
+
+    async def skip_publish():
+        pass
+
+    monkeypatch.setattr(email_tasks, "mail_scheduler", make_scheduler(max_retries=1))
+    monkeypatch.setattr(email_tasks, "publish_mail_stats", skip_publish)
+    monkeypatch.setattr(EmailService, "dead_letter", staticmethod(record_dead_letter))
+    smtp_sink.failures.extend(["451 Try again later"] * 2)
+
+    sent = await EmailService.send_email_async("approver@example.com", "NFA Approval Required", "<p>Review</p>")
+    await email_tasks.mail_scheduler.pool.close()
+
+    assert sent is False
+    assert smtp_sink.messages == []
+    assert [(to, subject) for to, subject, _ in dead_letters] == [("approver@example.com", "NFA Approval Required")]
+    assert dead_letters[0][2].code == 451
+
+async def test_delivered_email_is_not_dead_lettered(smtp_sink, monkeypatch):
+    from tasks import email_tasks
+    from tasks.email_tasks import EmailService
+
+    dead_letters = []
+
+    async def record_dead_letter(*args):
+        dead_letters.append(args)
+
+    async def skip_publish():
+        pass
+
+    monkeypatch.setattr(email_tasks, "mail_scheduler", make_scheduler(max_retries=1))
+    monkeypatch.setattr(email_tasks, "publish_mail_stats", skip_publish)
+    monkeypatch.setattr(EmailService, "dead_letter", staticmethod(record_dead_letter))
+
+    sent = await EmailService.send_email_async("approver@example.com", "NFA Approval Required", "<p>Review</p>")
+    await email_tasks.mail_scheduler.pool.close()
+
+    assert sent is True
+    assert len(smtp_sink.messages) == 1
+    assert dead_letters == []
@@ -0,0 +1,50 @@
+from core.config import settings
+from core.security import SecurityService, PasswordHashPool, pwd_context
+from passlib.hash import bcrypt
+import asyncio
+import pytest
+import time
+
+def rounds_of(hashed: str) -> int:
+    return int(hashed.split("$")[2])
+
+@pytest.mark.anyio
+async def test_verify_and_update_rehashes_outdated_cost():
+    old_hash = bcrypt.using(rounds=4).hash("User@123")
+
+    verified, new_hash = await SecurityService.verify_and_update_async("User@123", old_hash)
+
+    assert verified
+    assert new_hash is not None
+    assert rounds_of(new_hash) == settings.BCRYPT_ROUNDS
+    assert pwd_context.verify("User@123", new_hash)
+
+@pytest.mark.anyio
+async def test_verify_and_update_keeps_current_hash():
+    current_hash = await SecurityService.hash_password_async("User@123")
+
+    assert await SecurityService.verify_and_update_async("User@123", current_hash) == (True, None)
+    assert await SecurityService.verify_and_update_async("wrong", current_hash) == (False, None)
+
+@pytest.mark.anyio
+async def test_hashing_leaves_event_loop_responsive():
+    pool = PasswordHashPool(max_workers=2)
+    gaps = []
+
+    async def ticker(stop: asyncio.Event):
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    stop = asyncio.Event()
+    ticking = asyncio.create_task(ticker(stop))
+    await asyncio.gather(*(pool.run(pwd_context.hash, f"password-{n}") for n in range(4)))
+    stop.set()
+    await ticking
+
+    # Each hash takes hundreds of milliseconds; none of that may land on the loop
+    assert max(gaps) < 0.1
+    assert pool.stats() == {"workers": 2, "queue_depth": 0, "active": 0, "completed": 4}
@@ -0,0 +1,64 @@
+from email.message import EmailMessage
+from tasks.smtp_pool import SMTPPool
+import asyncio
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+def make_message(n: int) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "nfa@example.com"
+    message["To"] = f"approver{n}@example.com"
+    message["Subject"] = f"NFA Approval Required - {n}"
+    message.set_content("Please review")
+    return message
+
+async def test_reuses_one_connection(smtp_sink):
+    pool = SMTPPool(size=1, max_messages=100, idle_timeout=60)
+    for n in range(5):
+        await pool.send_message(make_message(n))
+    await pool.close()
+
+    assert len(smtp_sink.messages) == 5
+    assert pool.connections_opened == 1
+    assert len(smtp_sink.peers) == 1
+
+async def test_retires_connection_after_max_messages(smtp_sink):
+    pool = SMTPPool(size=1, max_messages=2, idle_timeout=60)
+    for n in range(5):
+        await pool.send_message(make_message(n))
+    await pool.close()
+
+    assert len(smtp_sink.messages) == 5
+    assert pool.connections_opened == 3
+
+async def test_redials_idle_connections(smtp_sink):
+    pool = SMTPPool(size=1, max_messages=100, idle_timeout=0)
+    for n in range(3):
+        await pool.send_message(make_message(n))
+    await pool.close()
+
+    assert pool.connections_opened == 3
+
+async def test_reconnects_after_relay_drops_session(smtp_sink):
+    pool = SMTPPool(size=1, max_messages=100, idle_timeout=60)
+    smtp_sink.hang_up = True
+    await pool.send_message(make_message(0))
+    await asyncio.sleep(0.2)
+    await pool.send_message(make_message(1))
+    await pool.close()
+
+    assert len(smtp_sink.messages) == 2
+    assert pool.connections_opened == 2
+
+async def test_failed_transaction_does_not_return_connection_to_pool(smtp_sink):
+    pool = SMTPPool(size=1, max_messages=100, idle_timeout=60)
+    smtp_sink.failures.append("554 Transaction failed")
+    with pytest.raises(Exception):
+        await pool.send_message(make_message(0))
+    await pool.send_message(make_message(1))
+    await pool.close()
+
+    assert len(smtp_sink.messages) == 1
+    assert pool.connections_opened == 2
+    assert pool.stats()["messages_sent"] == 1